@@ -1,14 +1,19 @@
 import os
 import subprocess
 import sys
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, url_for
+from services.jobs import job_runner
 
 deploy_bp = Blueprint('deploy', __name__)
 
+# Printed by deploy.sh just before it reloads the app (which ends the worker running the job)
+RELOAD_MARKER = 'Deployment complete, reloading application...'
+
 @deploy_bp.route('/api/deploy_trigger', methods=['POST'])
 def trigger_deploy():
     """
     Webhook endpoint to trigger local deployment script.
+    Queues a 'deploy' job and returns 202 right away; poll status_url for progress.
     Requires 'X-Deploy-Secret' header matching config.
     """
     secret = request.headers.get('X-Deploy-Secret')
@@ -22,34 +27,41 @@ def trigger_deploy():
     if not os.path.exists(deploy_script):
         return jsonify({"error": "deploy.sh not found"}), 404
 
-    try:
-        # Determine command based on OS
-        if sys.platform == 'win32':
-            # Windows fallback (Git Bash or similar required, likely won't work natively without shell)
-            # Just listing files as mock for local verification
-            cmd = ['cmd', '/c', 'echo "Mock Deploy on Windows"']
-        else:
-            # Linux (PythonAnywhere)
-            cmd = ['bash', deploy_script]
-
-        result = subprocess.run(
-            cmd, 
-            capture_output=True, 
-            text=True, 
-            cwd=current_app.root_path
-        )
-        
-        if result.returncode == 0:
-            return jsonify({
-                "status": "success", 
-                "output": result.stdout
-            }), 200
-        else:
-            return jsonify({
-                "status": "error", 
-                "output": result.stdout, 
-                "error": result.stderr
-            }), 500
-
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    # Runs in the background job pool; GitHub only needs to know it was accepted
+    job = job_runner.submit('deploy')
+    return jsonify({
+        "status": "queued",
+        "job_id": job.id,
+        "status_url": url_for('store.job_status', job_id=job.id, _external=True)
+    }), 202
+
+def run_deploy(ctx):
+    """Job handler: runs deploy.sh, streaming its output into the job log"""
+    # Determine command based on OS
+    if sys.platform == 'win32':
+        # Windows fallback (Git Bash or similar required, likely won't work natively without shell)
+        # Just listing files as mock for local verification
+        cmd = ['cmd', '/c', 'echo "Mock Deploy on Windows"']
+    else:
+        # Linux (PythonAnywhere)
+        cmd = ['bash', os.path.join(current_app.root_path, 'deploy.sh')]
+
+    ctx.progress(0, "Running deploy.sh")
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1,
+        cwd=current_app.root_path
+    )
+    for line in proc.stdout:
+        ctx.log(line)
+        if line.strip() == RELOAD_MARKER:
+            # Everything after this is the reload: record success while we still can
+            ctx.complete("Deployed, reloading")
+    returncode = proc.wait()
+
+    if returncode != 0:
+        raise RuntimeError(f"deploy.sh exited with status {returncode}")
+    ctx.progress(100, "Deployed")
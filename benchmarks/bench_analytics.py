@@ -0,0 +1,127 @@
+"""
+Consumption analytics over 5 years of synthetic issue history.
+
+    python -m benchmarks.bench_analytics [--years 5] [--issues-per-day 60]
+
+Builds a throwaway SQLite database, then times the single columnar query,
+the NumPy computation, a cached call and a row-by-row Python baseline of the
+weekly curves and anomaly medians.
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+import statistics
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+# The benchmark gets its own database; keep `import app` away from instance/store.db
+os.environ.setdefault('FLASK_TESTING', '1')
+
+from config import Config
+from app import create_app
+from models import db, User, Department, Teacher, Item, Issue, IssueLine
+from services import analytics
+
+def build_history(years, issues_per_day, n_items, n_teachers, seed=1):
+    """Issues on school days (no August), with term seasonality and a few 10x spikes"""
+    rng = random.Random(seed)
+    db.session.add(User(name="Admin", role="admin"))
+    dept = Department(name="Bench")
+    db.session.add(dept)
+    db.session.flush()
+    db.session.add_all([Teacher(name=f"Teacher {n}", department_id=dept.id) for n in range(n_teachers)])
+    db.session.add_all([Item(name=f"Item {n}", sku=f"BENCH-{n:05d}", stock_on_hand=1000) for n in range(n_items)])
+    db.session.commit()
+
+    end = date.today()
+    day = end - timedelta(days=365 * years)
+    issues, lines = [], []
+    issue_id = 0
+    while day < end:
+        if day.weekday() < 5 and day.month != 8:
+            busy = 1.5 if day.month == 9 else 1.0  # Back-to-school
+            for _ in range(int(issues_per_day * busy)):
+                issue_id += 1
+                created = datetime.combine(day, datetime.min.time()) + timedelta(minutes=rng.randrange(480, 960))
+                issues.append({'id': issue_id, 'teacher_id': rng.randrange(1, n_teachers + 1), 'user_id': 1,
+                               'signature_path': 'signatures/bench.png', 'created_at': created})
+                for _ in range(rng.randint(1, 4)):
+                    qty = rng.randint(1, 5) * (10 if rng.random() < 0.0005 else 1)
+                    lines.append({'issue_id': issue_id, 'item_id': rng.randrange(1, n_items + 1), 'qty': qty})
+        day += timedelta(days=1)
+
+    db.session.execute(Issue.__table__.insert(), issues)
+    db.session.execute(IssueLine.__table__.insert(), lines)
+    db.session.commit()
+    return end - timedelta(days=365 * years), end, len(lines)
+
+def python_baseline(start, end):
+    """Row-by-row equivalent of the weekly curves and (teacher, item) median weeks"""
+    rows = db.session.query(Issue.created_at, Issue.teacher_id, IssueLine.item_id, IssueLine.qty).join(
+        Issue, IssueLine.issue_id == Issue.id
+    ).filter(Issue.created_at >= datetime.combine(start, datetime.min.time())).all()
+    weekly = defaultdict(float)
+    pair_weeks = defaultdict(float)
+    for created_at, teacher_id, item_id, qty in rows:
+        week = (created_at.date() - start).days // 7
+        weekly[item_id, week] += qty
+        pair_weeks[teacher_id, item_id, week] += qty
+    by_pair = defaultdict(list)
+    for (teacher_id, item_id, _), qty in pair_weeks.items():
+        by_pair[teacher_id, item_id].append(qty)
+    return weekly, {pair: statistics.median(values) for pair, values in by_pair.items()}
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--issues-per-day', type=int, default=60)
+    parser.add_argument('--items', type=int, default=200)
+    parser.add_argument('--teachers', type=int, default=80)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tmp, 'bench.db')
+            REPORTING_DB_MODE = 'primary'
+
+        bench_app = create_app(BenchConfig, startup=False)
+        with bench_app.app_context():
+            db.create_all()
+            (start, end, n_lines), build_ms = timed(build_history, args.years, args.issues_per_day,
+                                                    args.items, args.teachers)
+            start, _ = analytics.week_range(start, end)
+            print(f"{n_lines:,} issue lines over {args.years} years (built in {build_ms / 1000:.1f}s)\n")
+
+            arrays, load_ms = timed(analytics.load_issue_arrays, start, end)
+            result, compute_ms = timed(analytics.compute_analytics, arrays, start, end)
+            _, report_ms = timed(analytics.to_report, result)
+            analytics._cache.clear()
+            _, first_ms = timed(analytics.get_consumption_analytics, start, end)
+            _, cached_ms = timed(analytics.get_consumption_analytics, start, end)
+            _, baseline_ms = timed(python_baseline, start, end)
+
+            print(f"{'step':<34}{'ms':>10}")
+            for label, ms in [
+                ('columnar query -> arrays', load_ms),
+                ('NumPy curves/seasonality/anomalies', compute_ms),
+                ('JSON-ready report', report_ms),
+                ('get_consumption_analytics (miss)', first_ms),
+                ('get_consumption_analytics (hit)', cached_ms),
+                ('row-by-row Python baseline', baseline_ms),
+            ]:
+                print(f"{label:<34}{ms:>10,.1f}")
+            print(f"\n{len(result['item_ids'])} items x {result['weeks']} weeks, "
+                  f"{len(result['anomalies']['qty'])} anomalies flagged")
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+
+if __name__ == '__main__':
+    main()
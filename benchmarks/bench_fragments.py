@@ -0,0 +1,57 @@
+"""
+Renders/sec for the HTMX fragments, render_template vs render_fragment.
+
+    python -m benchmarks.bench_fragments [--seconds 1.0]
+
+Uses plain objects instead of DB rows so only template rendering is measured.
+"""
+import time
+import argparse
+from types import SimpleNamespace
+
+from flask import render_template, session
+from app import app
+from services.templating import render_fragment
+
+def make_items(n):
+    return [SimpleNamespace(id=i, name=f"Item {i}", sku=f"SKU-{i:05d}", stock_on_hand=i % 12,
+                            reorder_level=5, qty=1 + i % 3) for i in range(1, n + 1)]
+
+def make_teachers(n):
+    dept = SimpleNamespace(name="Science")
+    return [SimpleNamespace(id=i, name=f"Teacher {i}", department=dept) for i in range(1, n + 1)]
+
+# (label, template, context, query string) at the sizes the routes actually return
+CASES = [
+    ('item_search x10', 'hx/item_search.html', lambda: {'items': make_items(10)}, '?q=pen'),
+    ('item_search x1 (scan)', 'hx/item_search.html', lambda: {'items': make_items(1)}, '?q=SS-00000017'),
+    ('teacher_search x10', 'hx/teacher_search.html', lambda: {'teachers': make_teachers(10)}, '?q=te'),
+    ('cart x3', 'hx/cart.html', lambda: {'cart_items': make_items(3)}, ''),
+    ('cart x20', 'hx/cart.html', lambda: {'cart_items': make_items(20)}, ''),
+]
+
+def rate(fn, seconds):
+    fn()  # warm up
+    count, start = 0, time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        fn()
+        count += 1
+    return count / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=1.0, help="time spent per measurement")
+    args = parser.parse_args()
+
+    print(f"{'fragment':<24}{'render_template/s':>20}{'render_fragment/s':>20}{'speedup':>10}")
+    for label, template, make_context, query in CASES:
+        context = make_context()
+        with app.test_request_context('/hx/bench' + query):
+            # Real fragment requests come from a page load, so the session already has a user
+            session['user_id'] = 1
+            full = rate(lambda: render_template(template, **context), args.seconds)
+            fast = rate(lambda: render_fragment(template, **context), args.seconds)
+        print(f"{label:<24}{full:>20,.0f}{fast:>20,.0f}{fast / full:>9.2f}x")
+
+if __name__ == '__main__':
+    main()
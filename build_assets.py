@@ -0,0 +1,9 @@
+from services.assets import build_assets
+import os
+
+# Fingerprints and pre-compresses static assets into static/dist/.
+# Run on every deploy (see deploy.sh); templates fall back to plain /static URLs until it has run.
+static_dir = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'static')
+manifest = build_assets(static_dir)
+for source, hashed in sorted(manifest.items()):
+    print(f"{source} -> dist/{hashed}")
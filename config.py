@@ -9,3 +9,38 @@ class Config:
     
     # Instance path for file saves
     INSTANCE_PATH = os.path.join(BASE_DIR, 'instance')
+
+    # Startup work (see services.startup); create_all only runs when the models changed
+    STARTUP_PRECOMPILE_TEMPLATES = True
+    STARTUP_ENSURE_SCHEMA = True
+    STARTUP_RESUME_JOBS = True
+    STARTUP_WAL_CHECKPOINTS = True
+
+    # Background job threads per worker process (per-type limits are set in create_app)
+    JOBS_MAX_WORKERS = 2
+
+    # None follows app.debug: template files are never stat'ed per render in production,
+    # and debug runs (python app.py, FLASK_DEBUG=1) still pick up template edits
+    TEMPLATES_AUTO_RELOAD = None
+
+    # Response cache for read-mostly pages/fragments: 'memory' (per worker) or 'sqlite' (shared)
+    RESPONSE_CACHE_ENABLED = True
+    RESPONSE_CACHE_BACKEND = 'memory'
+
+    # Reports read from 'snapshot' (backup copy), 'readonly' (mode=ro on the live file) or 'primary'
+    REPORTING_DB_MODE = 'snapshot'
+    REPORTING_SNAPSHOT_SECONDS = 60
+
+    # WAL checkpoint scheduler; switches to TRUNCATE once the WAL passes WAL_TRUNCATE_BYTES
+    WAL_CHECKPOINT_SECONDS = 60
+    WAL_TRUNCATE_BYTES = 16 * 1024 * 1024
+
+    # Multi-school tenancy: each school in TENANTS gets instance/tenants/<slug>/store.db,
+    # resolved from <slug>.TENANT_HOST_SUFFIX or a /t/<slug>/ path prefix.
+    # Requests without a school use SQLALCHEMY_DATABASE_URI as before.
+    TENANCY_ENABLED = os.environ.get('TENANCY_ENABLED') == '1'
+    TENANTS = [t for t in os.environ.get('TENANTS', '').split(',') if t]
+    TENANT_HOST_SUFFIX = os.environ.get('TENANT_HOST_SUFFIX')
+    TENANT_PATH_PREFIX = '/t'
+    # Open school databases kept per worker; the least recently used is closed beyond this
+    TENANT_MAX_ENGINES = 16
@@ -12,10 +12,14 @@ git pull origin main
 source venv/bin/activate
 pip install -r requirements.txt
 
-# 3. Reload the application
+# 3. Build fingerprinted / pre-compressed static assets
+python build_assets.py
+
+# 4. Reload the application
+# Reloading ends the worker running this script: the marker line below tells
+# the deploy job the deployment is done before that happens (see api_deploy.py)
+echo "Deployment complete, reloading application..."
 # Touch the wsgi file to trigger reload (standard PA method)
 # Replace 'yourusername_pythonanywhere_com_wsgi.py' with your actual WSGI file path if known, 
 # or generically:
 touch /var/www/*_wsgi.py
-
-echo "Deployment complete! Check your website."
@@ -1,16 +1,49 @@
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+import sqlite3
 from sqlalchemy import event, UniqueConstraint
 from sqlalchemy.engine import Engine
 from datetime import datetime
 
-db = SQLAlchemy()
+class TenantSession(Session):
+    """Binds every query to the current school's database when a tenant is active (services.tenancy)"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._db.tenant_engine is not None:
+            engine = self._db.tenant_engine()
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+class TenantSQLAlchemy(SQLAlchemy):
+    # Set by services.tenancy: returns the current tenant's Engine, or None for the default database
+    tenant_engine = None
+
+    @property
+    def engine(self):
+        if self.tenant_engine is not None:
+            engine = self.tenant_engine()
+            if engine is not None:
+                return engine
+        return self.engines[None]
+
+    @property
+    def default_engine(self):
+        """The shared database (job queue), whatever tenant is active"""
+        return self.engines[None]
+
+db = TenantSQLAlchemy(session_options={'class_': TenantSession})
 
 # SQLite Optimization
 @event.listens_for(Engine, "connect")
 def set_sqlite_pragma(dbapi_connection, connection_record):
     cursor = dbapi_connection.cursor()
-    cursor.execute("PRAGMA journal_mode=WAL")
-    cursor.execute("PRAGMA synchronous=NORMAL")
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+    except sqlite3.OperationalError:
+        # Read-only reporting connections (services.reporting) can't change the journal mode
+        pass
     cursor.close()
 
 class User(db.Model):
@@ -77,3 +110,55 @@ class InventoryLog(db.Model):
     __table_args__ = (
         db.Index('idx_inv_item_created', 'item_id', 'created_at'),
     )
+
+class ReorderAlert(db.Model):
+    # One row per low-stock episode; open while cleared_at is NULL
+    id = db.Column(db.Integer, primary_key=True)
+    item_id = db.Column(db.Integer, db.ForeignKey('item.id'), nullable=False)
+    stock_on_hand = db.Column(db.Integer, nullable=False)  # Latest stock while open
+    reorder_level = db.Column(db.Integer, nullable=False)
+    raised_at = db.Column(db.DateTime, default=datetime.utcnow)
+    cleared_at = db.Column(db.DateTime, nullable=True)
+
+    item = db.relationship('Item')
+
+    __table_args__ = (
+        db.Index('idx_reorder_item_open', 'item_id', 'cleared_at'),
+        db.Index('idx_reorder_open', 'cleared_at', 'item_id'),
+    )
+
+class IdSequence(db.Model):
+    # Persistent counters handed out in blocks by services.allocator
+    name = db.Column(db.String(50), primary_key=True)
+    next_value = db.Column(db.Integer, nullable=False, default=1)
+
+class CacheGeneration(db.Model):
+    # Bumped by write paths to invalidate cached responses (services.cache)
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+
+class Job(db.Model):
+    # Background jobs run by services.jobs; survives worker restarts
+    id = db.Column(db.Integer, primary_key=True)
+    job_type = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, succeeded, failed
+    params = db.Column(db.Text, nullable=False, default='{}')  # JSON kwargs for the handler
+    progress = db.Column(db.Integer, nullable=False, default=0)  # 0-100
+    message = db.Column(db.String(255), nullable=True)
+    output = db.Column(db.Text, nullable=False, default='')
+    error = db.Column(db.Text, nullable=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    owner = db.Column(db.String(64), nullable=True)  # Worker process running it
+    tenant = db.Column(db.String(63), nullable=True)  # School the job runs for (None = default database)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('idx_job_status_type', 'status', 'job_type'),
+    )
+
+    @property
+    def finished(self):
+        return self.status in ('succeeded', 'failed')
@@ -0,0 +1,84 @@
+import threading
+from sqlalchemy import select, update, insert
+from sqlalchemy.exc import IntegrityError
+from models import db, IdSequence
+from services.tenancy import current_tenant
+
+# Values reserved per round-trip to the sequence table.
+# Unused values in a block are lost when the worker recycles, which is fine:
+# we only need uniqueness, not gap-free numbering.
+BLOCK_SIZE = 100
+
+def reserve_block(name, size):
+    """
+    Atomically reserves `size` values from the named sequence.
+    Runs on its own connection so it never commits (or rolls back) the caller's session.
+    Returns the first value of the reserved block.
+    """
+    table = IdSequence.__table__
+    for _ in range(2):
+        try:
+            with db.engine.begin() as conn:
+                updated = conn.execute(
+                    update(table)
+                    .where(table.c.name == name)
+                    .values(next_value=table.c.next_value + size)
+                ).rowcount
+                if not updated:
+                    conn.execute(insert(table).values(name=name, next_value=1 + size))
+                    return 1
+                end = conn.execute(
+                    select(table.c.next_value).where(table.c.name == name)
+                ).scalar_one()
+                return end - size
+        except IntegrityError:
+            # Another worker created the sequence row first; retry as an update
+            continue
+    raise RuntimeError(f"Could not reserve values from sequence '{name}'")
+
+class BlockAllocator:
+    """
+    Hands out unique integers from a persistent sequence.
+    Each worker holds a block in memory, so allocation is an O(1) pop and
+    only touches the database once every `block_size` values.
+    """
+
+    def __init__(self, name, block_size=BLOCK_SIZE, reserve=reserve_block):
+        self.name = name
+        self.block_size = block_size
+        self._reserve = reserve
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+
+    def next_value(self):
+        with self._lock:
+            if self._next >= self._end:
+                start = self._reserve(self.name, self.block_size)
+                self._next, self._end = start, start + self.block_size
+            value = self._next
+            self._next += 1
+            return value
+
+# One allocator per (school, sequence name), per worker process
+_allocators = {}
+_registry_lock = threading.Lock()
+
+def get_allocator(name):
+    # Each school's database has its own id_sequence table, so blocks are never shared
+    key = (current_tenant(), name)
+    with _registry_lock:
+        allocator = _allocators.get(key)
+        if allocator is None:
+            allocator = _allocators[key] = BlockAllocator(name)
+        return allocator
+
+def allocate(name):
+    return get_allocator(name).next_value()
+
+def gs1_check_digit(digits):
+    """GS1 mod-10 check digit: weights 3,1,3,... from the rightmost digit"""
+    total = 0
+    for i, ch in enumerate(reversed(digits)):
+        total += int(ch) * (3 if i % 2 == 0 else 1)
+    return str((10 - total % 10) % 10)
@@ -0,0 +1,259 @@
+import itertools
+from contextlib import contextmanager
+from datetime import date, timedelta
+import numpy as np
+from sqlalchemy import select
+from models import Item, Teacher
+from services.reporting import reporting_db
+from services.cache import MemoryStore, get_generations
+from services.tenancy import current_tenant
+
+# Consumption analytics over the issue history, computed on NumPy arrays.
+# The facts are loaded with a single query (one row per issue line) and every
+# aggregate below is a bincount/cumsum/sort over those columns: no per-row Python.
+
+# Rolling average window for the weekly curves
+ROLLING_WEEKS = 4
+# Weeks fitted by the linear trend, and weeks forecast after the range
+TREND_WEEKS = 12
+FORECAST_WEEKS = 4
+# A teacher's week is flagged when it is ANOMALY_FACTOR x their usual (median) week
+# for that item, once they have at least ANOMALY_MIN_WEEKS weeks of history
+ANOMALY_FACTOR = 10
+ANOMALY_MIN_WEEKS = 4
+# School terms by calendar month (the week's Monday decides its term)
+TERMS = [
+    ('autumn', (9, 10, 11, 12)),
+    ('spring', (1, 2, 3)),
+    ('summer', (4, 5, 6, 7, 8)),
+]
+# The 'items' generation is bumped by every stock change, issues included
+DEPENDS_ON = ('items',)
+# Longest range one request may analyse (5 years, leap days included)
+MAX_RANGE_YEARS = 5
+MAX_RANGE = timedelta(days=366 * MAX_RANGE_YEARS)
+
+MONTH_TERM = np.zeros(13, dtype=np.int64)
+for _index, (_name, _months) in enumerate(TERMS):
+    MONTH_TERM[list(_months)] = _index
+
+_cache = MemoryStore(max_entries=64)
+
+def week_range(start, end):
+    """Aligns [start, end) to whole weeks starting on Monday; returns (start, n_weeks)"""
+    start = start - timedelta(days=start.weekday())
+    n_weeks = max(1, -(-(end - start).days // 7))
+    return start, n_weeks
+
+def week_terms(start, n_weeks):
+    """Term index of each week (by the month of its Monday)"""
+    mondays = np.datetime64(start, 'D') + 7 * np.arange(n_weeks)
+    months = mondays.astype('datetime64[M]').astype(np.int64) % 12 + 1
+    return MONTH_TERM[months]
+
+# One row per issue line, as plain integers (the day offset is computed by SQLite)
+ISSUE_FACTS_SQL = """
+    SELECT CAST(julianday(issue.created_at) - julianday(:start) AS INTEGER),
+           issue.teacher_id, issue_line.item_id, issue_line.qty
+    FROM issue_line JOIN issue ON issue_line.issue_id = issue.id
+    WHERE issue.created_at >= :start AND issue.created_at < :end
+"""
+
+def load_issue_arrays(start, end, session=None):
+    """
+    One query over issue lines in [start, end): returns int64 columns
+    day (offset from `start`), teacher_id, item_id and qty.
+    Read on the DB-API cursor: building ORM rows would cost more than the analysis.
+    """
+    with _reporting_session(session) as s:
+        cursor = s.connection().connection.cursor()
+        try:
+            cursor.execute(ISSUE_FACTS_SQL, {'start': start.isoformat(), 'end': end.isoformat()})
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+
+    flat = np.fromiter(itertools.chain.from_iterable(rows), dtype=np.int64, count=len(rows) * 4)
+    columns = flat.reshape(-1, 4).T
+    return {'day': columns[0], 'teacher_id': columns[1], 'item_id': columns[2], 'qty': columns[3]}
+
+def rolling_mean(matrix, window):
+    """Trailing mean along axis 1; the first weeks average over what is available"""
+    sums = np.cumsum(matrix, axis=1)
+    sums = np.concatenate([np.zeros((matrix.shape[0], 1)), sums], axis=1)
+    cols = np.arange(matrix.shape[1])
+    lower = np.maximum(cols + 1 - window, 0)
+    return (sums[:, cols + 1] - sums[:, lower]) / (cols + 1 - lower)
+
+def group_median(groups, values, n_groups):
+    """Median of `values` per group id (0..n_groups-1) and the group sizes, via one sort"""
+    order = np.lexsort((values, groups))
+    sorted_values = values[order]
+    counts = np.bincount(groups, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    medians = np.zeros(n_groups)
+    present = counts > 0
+    lo = (starts + (counts - 1) // 2)[present]
+    hi = (starts + counts // 2)[present]
+    medians[present] = (sorted_values[lo] + sorted_values[hi]) / 2
+    return medians, counts
+
+def linear_forecast(matrix, window, horizon):
+    """Least-squares line through the last `window` weeks of each row, extended `horizon` weeks"""
+    recent = matrix[:, -window:]
+    k = recent.shape[1]
+    x = np.arange(k) - (k - 1) / 2
+    denom = (x ** 2).sum()
+    slope = (recent * x).sum(axis=1) / denom if denom else np.zeros(len(matrix))
+    level = recent.mean(axis=1)
+    steps = (k - 1) / 2 + np.arange(1, horizon + 1)
+    return level[:, None] + slope[:, None] * steps
+
+def compute_analytics(arrays, start, end):
+    """
+    Pure NumPy part: weekly curves, rolling means, percentiles, term seasonality,
+    forecasts and anomaly flags from the columns of load_issue_arrays().
+    Item/teacher ids are returned as-is; names are resolved by the caller.
+    """
+    monday, n_weeks = week_range(start, end)
+    item_ids, item_idx = np.unique(arrays['item_id'], return_inverse=True)
+    n_items = len(item_ids)
+    qty = arrays['qty'].astype(np.float64)
+    # `day` counts from `start`, which may not be a Monday
+    week = (arrays['day'] + (start - monday).days) // 7
+    start = monday
+
+    weekly = np.bincount(item_idx * n_weeks + week, weights=qty,
+                         minlength=n_items * n_weeks).reshape(n_items, n_weeks)
+    rolling = rolling_mean(weekly, ROLLING_WEEKS)
+    p50, p90 = np.percentile(weekly, [50, 90], axis=1)
+
+    # Seasonality: average week in each term relative to the item's average week
+    terms = week_terms(start, n_weeks)
+    n_terms = len(TERMS)
+    weeks_per_term = np.bincount(terms, minlength=n_terms)
+    term_totals = np.bincount(item_idx * n_terms + terms[week], weights=qty,
+                              minlength=n_items * n_terms).reshape(n_items, n_terms)
+    overall = weekly.sum(axis=1) / n_weeks
+    with np.errstate(divide='ignore', invalid='ignore'):
+        term_rate = term_totals / weeks_per_term
+        seasonality = term_rate / overall[:, None]
+    seasonality = np.where(np.isfinite(seasonality) & (weeks_per_term > 0), seasonality, 1.0)
+
+    # Forecast: recent trend, scaled by how the coming weeks' terms compare to the fitted ones
+    window = min(TREND_WEEKS, n_weeks)
+    trend = linear_forecast(weekly, window, FORECAST_WEEKS)
+    future_terms = week_terms(start + timedelta(weeks=n_weeks), FORECAST_WEEKS)
+    fitted = seasonality[:, terms[-window:]].mean(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        factor = np.where(fitted > 0, seasonality[:, future_terms] / fitted, 1.0)
+    forecast = np.maximum(trend * factor, 0)
+
+    # Anomalies: weekly totals per (teacher, item) against that pair's median week
+    teacher_ids, teacher_idx = np.unique(arrays['teacher_id'], return_inverse=True)
+    key = (teacher_idx * n_items + item_idx) * n_weeks + week
+    keys, key_idx = np.unique(key, return_inverse=True)
+    totals = np.bincount(key_idx, weights=qty)
+    pairs, pair_idx = np.unique(keys // n_weeks, return_inverse=True)
+    usual, history = group_median(pair_idx, totals, len(pairs))
+    usual, history = usual[pair_idx], history[pair_idx]
+    flagged = np.flatnonzero((history >= ANOMALY_MIN_WEEKS) & (totals >= ANOMALY_FACTOR * usual))
+    flagged = flagged[np.argsort(-totals[flagged], kind='stable')]
+
+    return {
+        'start': start,
+        'weeks': n_weeks,
+        'item_ids': item_ids,
+        'weekly': weekly,
+        'rolling': rolling,
+        'p50': p50,
+        'p90': p90,
+        'seasonality': seasonality,
+        'forecast': forecast,
+        'anomalies': {
+            'teacher_id': teacher_ids[keys[flagged] // n_weeks // n_items],
+            'item_id': item_ids[keys[flagged] // n_weeks % n_items],
+            'week': keys[flagged] % n_weeks,
+            'qty': totals[flagged],
+            'usual': usual[flagged]
+        }
+    }
+
+def to_report(result, session=None):
+    """JSON-ready dict with item and teacher names"""
+    start = result['start']
+    anomalies = result['anomalies']
+    item_names = _names(Item, result['item_ids'], session)
+    teacher_names = _names(Teacher, anomalies['teacher_id'], session)
+    return {
+        'weeks': [(start + timedelta(weeks=w)).isoformat() for w in range(result['weeks'])],
+        'forecast_weeks': [(start + timedelta(weeks=result['weeks'] + w)).isoformat()
+                           for w in range(FORECAST_WEEKS)],
+        'items': [{
+            'item_id': item_id,
+            'name': item_names.get(item_id),
+            'total': float(result['weekly'][i].sum()),
+            'weekly': result['weekly'][i].tolist(),
+            'rolling': np.round(result['rolling'][i], 2).tolist(),
+            'p50': float(result['p50'][i]),
+            'p90': float(result['p90'][i]),
+            'seasonality': {name: round(float(result['seasonality'][i, t]), 2)
+                            for t, (name, _) in enumerate(TERMS)},
+            'forecast': np.round(result['forecast'][i], 1).tolist()
+        } for i, item_id in enumerate(result['item_ids'].tolist())],
+        'anomalies': [{
+            'teacher_id': teacher_id,
+            'teacher': teacher_names.get(teacher_id),
+            'item_id': item_id,
+            'item': item_names.get(item_id),
+            'week': (start + timedelta(weeks=week)).isoformat(),
+            'qty': qty,
+            'usual': usual
+        } for teacher_id, item_id, week, qty, usual in zip(
+            anomalies['teacher_id'].tolist(), anomalies['item_id'].tolist(),
+            anomalies['week'].tolist(), anomalies['qty'].tolist(), anomalies['usual'].tolist()
+        )]
+    }
+
+def _names(model, ids, session=None):
+    ids = list(set(np.asarray(ids).tolist()))
+    if not ids:
+        return {}
+    with _reporting_session(session) as s:
+        return dict(s.execute(select(model.id, model.name).where(model.id.in_(ids))).all())
+
+@contextmanager
+def _reporting_session(session=None):
+    """The caller's reporting session, or a new one for this call"""
+    if session is not None:
+        yield session
+        return
+    with reporting_db.session() as s:
+        yield s
+
+def get_consumption_analytics(start, end):
+    """
+    Analytics report for issues in [start, end) (dates; start is moved back to its Monday).
+    Cached per school and date range until the next stock change.
+    """
+    start, n_weeks = week_range(start, end)
+    end = start + timedelta(weeks=n_weeks)
+    key = (current_tenant(), start.isoformat(), end.isoformat())
+    with reporting_db.session() as s:
+        # Generations come from the same snapshot as the facts (and are read first):
+        # a report built from a stale snapshot keeps that snapshot's stamp
+        generations = get_generations(DEPENDS_ON, session=s)
+        entry = _cache.get(key)
+        if entry is not None and entry['generations'] == generations:
+            return entry['report']
+
+        report = to_report(compute_analytics(load_issue_arrays(start, end, session=s), start, end), session=s)
+    report['start'], report['end'] = start.isoformat(), end.isoformat()
+    _cache.set(key, {'generations': generations, 'report': report})
+    return report
+
+def default_range(today=None):
+    """The last 52 whole weeks, up to and including the current one"""
+    today = today or date.today()
+    end = today - timedelta(days=today.weekday()) + timedelta(weeks=1)
+    return end - timedelta(weeks=52), end
@@ -0,0 +1,140 @@
+import os
+import json
+import hashlib
+import mimetypes
+from flask import current_app, url_for, send_from_directory, request
+
+# Source files under static/ that get fingerprinted
+ASSETS = ['app.css', 'app.js', 'scanner.js', 'signature.js']
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'assets.json'
+# Previous manifests, newest first; their files are kept for workers and service workers still on them
+HISTORY_NAME = 'builds.json'
+KEEP_BUILDS = 2
+ONE_YEAR = 31536000
+
+# Pre-compressed variants, in order of preference: (Content-Encoding, file suffix)
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+def build_assets(static_dir):
+    """
+    Copies each asset to static/dist/<name>.<hash>.<ext> with .gz/.br siblings
+    and writes the {source: fingerprinted} manifest. Returns the manifest.
+    Files of the last KEEP_BUILDS builds stay in place: running workers and cached
+    checkout shells keep loading the hashes they know until they reload.
+    """
+    # Build-time only, so not imported by serving workers
+    import gzip
+    try:
+        import brotli
+    except ImportError:  # Optional: gzip-only builds still work
+        brotli = None
+
+    dist_dir = os.path.join(static_dir, DIST_DIR)
+    os.makedirs(dist_dir, exist_ok=True)
+
+    manifest = {}
+    for name in ASSETS:
+        with open(os.path.join(static_dir, name), 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        base, ext = os.path.splitext(name)
+        hashed = f"{base}.{digest}{ext}"
+        target = os.path.join(dist_dir, hashed)
+
+        if os.path.exists(target):
+            # Unchanged asset: same hash, same files
+            manifest[name] = hashed
+            continue
+        with open(target, 'wb') as f:
+            f.write(data)
+        with open(target + '.gz', 'wb') as f:
+            # mtime=0 keeps the output reproducible between builds
+            f.write(gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            with open(target + '.br', 'wb') as f:
+                f.write(brotli.compress(data, quality=11))
+        manifest[name] = hashed
+
+    history = [manifest] + [m for m in _read_json(os.path.join(dist_dir, HISTORY_NAME), []) if m != manifest]
+    history = history[:KEEP_BUILDS]
+    _write_json(os.path.join(dist_dir, HISTORY_NAME), history)
+    _write_json(os.path.join(dist_dir, MANIFEST_NAME), manifest)
+    prune_builds(dist_dir, history)
+    return manifest
+
+def prune_builds(dist_dir, history):
+    """Removes fingerprinted files (and their .gz/.br) no manifest in `history` refers to"""
+    keep = {MANIFEST_NAME, HISTORY_NAME}
+    for manifest in history:
+        for hashed in manifest.values():
+            keep.update([hashed] + [hashed + suffix for _, suffix in ENCODINGS])
+    for name in os.listdir(dist_dir):
+        if name not in keep and not name.endswith('.tmp'):
+            os.remove(os.path.join(dist_dir, name))
+
+def _read_json(path, default):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+def _write_json(path, data):
+    # Written then renamed, so serving workers never read half a manifest
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+_manifest_cache = {}
+
+def load_manifest(static_dir):
+    """Reads the build manifest once per worker; empty if assets were never built"""
+    if static_dir not in _manifest_cache:
+        path = os.path.join(static_dir, DIST_DIR, MANIFEST_NAME)
+        try:
+            with open(path) as f:
+                _manifest_cache[static_dir] = json.load(f)
+        except (OSError, ValueError):
+            _manifest_cache[static_dir] = {}
+    return _manifest_cache[static_dir]
+
+def manifest_version(static_dir):
+    """Short hash of the whole manifest, used to version the service worker cache"""
+    manifest = load_manifest(static_dir)
+    if not manifest:
+        return 'dev'
+    return hashlib.sha256(json.dumps(manifest, sort_keys=True).encode()).hexdigest()[:12]
+
+def asset_url(filename):
+    """
+    Jinja helper: fingerprinted URL when the asset was built,
+    plain /static URL otherwise (local development).
+    """
+    hashed = load_manifest(current_app.static_folder).get(filename)
+    if hashed:
+        return url_for('store.static_asset', filename=hashed)
+    return url_for('static', filename=filename)
+
+def send_asset(filename):
+    """
+    Serves a fingerprinted asset, preferring a pre-compressed variant the client accepts.
+    File names carry their content hash, so responses are cached forever.
+    """
+    dist_dir = os.path.join(current_app.static_folder, DIST_DIR)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    accepted = request.accept_encodings
+
+    response = None
+    for encoding, suffix in ENCODINGS:
+        if accepted[encoding] and os.path.isfile(os.path.join(dist_dir, filename + suffix)):
+            response = send_from_directory(dist_dir, filename + suffix, mimetype=mimetype)
+            response.headers['Content-Encoding'] = encoding
+            break
+    if response is None:
+        response = send_from_directory(dist_dir, filename, mimetype=mimetype)
+
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = f'public, max-age={ONE_YEAR}, immutable'
+    return response
@@ -1,11 +1,30 @@
-import barcode
-from barcode.writer import ImageWriter
 import os
-import random
+from models import db, Item
+from services.allocator import allocate, gs1_check_digit
+from services.tenancy import tenant_instance_path
+
+BARCODE_PREFIX = "SS-"
+SERIAL_DIGITS = 7
 
 def generate_barcode_value():
-    """Generates a stable unique barcode string like SS-102938"""
-    return f"SS-{random.randint(100000, 999999)}"
+    """
+    Generates a unique barcode string like SS-00001234 from the 'barcode' sequence.
+    The last digit is a GS1 check digit so scanned reads can be validated.
+    """
+    body = f"{allocate('barcode'):0{SERIAL_DIGITS}d}"
+    return f"{BARCODE_PREFIX}{body}{gs1_check_digit(body)}"
+
+def is_valid_barcode_value(code):
+    """
+    Validates the check digit of a generated barcode.
+    Legacy values (SS-XXXXXX, manual entries) have no check digit and are accepted as-is.
+    """
+    if not code.startswith(BARCODE_PREFIX):
+        return True
+    digits = code[len(BARCODE_PREFIX):]
+    if len(digits) != SERIAL_DIGITS + 1 or not digits.isdigit():
+        return True
+    return gs1_check_digit(digits[:-1]) == digits[-1]
 
 def create_barcode_image(code, instance_path):
     """
@@ -19,6 +38,10 @@ def create_barcode_image(code, instance_path):
     filename = f"{code}" 
     filepath = os.path.join(barcodes_dir, filename)
     
+    # python-barcode pulls in Pillow: import on first render, not at worker startup
+    import barcode
+    from barcode.writer import ImageWriter
+
     # Use Code128
     rv = barcode.get_barcode_class('code128')
     writer = ImageWriter()
@@ -33,3 +56,24 @@ def get_barcode_path(code, instance_path):
     if not os.path.exists(expected_path):
         return create_barcode_image(code, instance_path)
     return expected_path
+
+def barcode_image_exists(code, instance_path):
+    return os.path.exists(os.path.join(instance_path, 'barcodes', f"{code}.png"))
+
+def render_barcodes(ctx, item_ids=None):
+    """Job handler: pre-renders label images (all active items, or `item_ids`)"""
+    query = Item.query.filter_by(active=True)
+    if item_ids:
+        query = Item.query.filter(Item.id.in_(item_ids))
+    items = query.order_by(Item.id).all()
+
+    for item in items:
+        if not item.barcode:
+            item.barcode = generate_barcode_value()
+    db.session.commit()
+
+    instance_path = tenant_instance_path()
+    for n, item in enumerate(items, start=1):
+        if not barcode_image_exists(item.barcode, instance_path):
+            create_barcode_image(item.barcode, instance_path)
+        ctx.progress(n * 100 / len(items), f"{n}/{len(items)} labels")
@@ -0,0 +1,206 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict, defaultdict
+from functools import wraps
+from flask import request, session, make_response
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+from models import db, CacheGeneration
+from services.tenancy import current_tenant
+
+# --- Generation counters ---
+# Each cached endpoint declares the tables it reads. Write paths bump those
+# tables' generation inside their own transaction, and cached entries stamped
+# with an older generation simply stop matching.
+
+def bump_generation(*names):
+    """Invalidates cached responses that depend on `names`. Commits with the caller's session."""
+    table = CacheGeneration.__table__
+    for name in names:
+        # First insert uses the clock so counters never repeat after the table is recreated
+        stmt = insert(table).values(name=name, value=time.time_ns())
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c.name],
+            set_={'value': table.c.value + 1}
+        ))
+
+def get_generations(names, session=None):
+    """Current values of `names`; `session` reads them from another connection (e.g. a report snapshot)"""
+    table = CacheGeneration.__table__
+    rows = (session or db.session).execute(
+        select(table.c.name, table.c.value).where(table.c.name.in_(names))
+    ).all()
+    found = dict(rows)
+    return [found.get(name, 0) for name in names]
+
+# --- Stores ---
+
+class MemoryStore:
+    """Per-worker LRU dict"""
+
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+class SQLiteStore:
+    """Shared between workers through a small side database (not the store DB, to keep its WAL quiet)"""
+
+    PRUNE_EVERY = 100
+
+    def __init__(self, path, max_entries=5000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache ("
+            "key TEXT PRIMARY KEY, generations TEXT NOT NULL, etag TEXT NOT NULL, "
+            "content_type TEXT NOT NULL, body BLOB NOT NULL, stored_at REAL NOT NULL)"
+        )
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT generations, etag, content_type, body FROM response_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {'generations': json.loads(row[0]), 'etag': row[1], 'content_type': row[2], 'body': row[3]}
+
+    def set(self, key, entry):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO response_cache VALUES (?, ?, ?, ?, ?, ?)",
+                (key, json.dumps(entry['generations']), entry['etag'], entry['content_type'], entry['body'], time.time())
+            )
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                self._conn.execute(
+                    "DELETE FROM response_cache WHERE key IN ("
+                    "SELECT key FROM response_cache ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM response_cache")
+
+# --- Response cache ---
+
+class ResponseCache:
+    """
+    Caches rendered GET responses keyed by endpoint + query args,
+    validated against the generation of every table the endpoint reads.
+    """
+
+    def __init__(self):
+        self.store = None
+        self.enabled = False
+        self._stats = defaultdict(lambda: {'hits': 0, 'misses': 0, 'not_modified': 0})
+        self._stats_lock = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = app.config.get('RESPONSE_CACHE_ENABLED', True)
+        backend = app.config.get('RESPONSE_CACHE_BACKEND', 'memory')
+        if backend == 'sqlite':
+            os.makedirs(app.instance_path, exist_ok=True)
+            self.store = SQLiteStore(os.path.join(app.instance_path, 'response_cache.db'))
+        elif backend == 'memory':
+            self.store = MemoryStore()
+        else:
+            raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND '{backend}'")
+
+    def cached(self, *tables):
+        """Decorator for read-mostly views; `tables` are the generation names the view depends on"""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                # Pending flash messages are rendered into the page: never serve or store those
+                if not self.enabled or request.method != 'GET' or session.get('_flashes'):
+                    return view(*args, **kwargs)
+
+                endpoint = request.endpoint
+                key = self._key(endpoint, kwargs)
+                generations = get_generations(tables)
+                entry = self.store.get(key)
+
+                if entry is not None and entry['generations'] == generations:
+                    if request.if_none_match.contains(entry['etag']):
+                        self._count(endpoint, 'not_modified')
+                        resp = make_response('', 304)
+                    else:
+                        self._count(endpoint, 'hits')
+                        resp = make_response(entry['body'])
+                        resp.headers['Content-Type'] = entry['content_type']
+                    resp.set_etag(entry['etag'])
+                    return resp
+
+                self._count(endpoint, 'misses')
+                resp = make_response(view(*args, **kwargs))
+                if resp.status_code != 200:
+                    return resp
+                body = resp.get_data()
+                etag = hashlib.sha1(body).hexdigest()[:16]
+                self.store.set(key, {
+                    'generations': generations,
+                    'etag': etag,
+                    'content_type': resp.headers.get('Content-Type', 'text/html; charset=utf-8'),
+                    'body': body
+                })
+                resp.set_etag(etag)
+                if request.if_none_match.contains(etag):
+                    return make_response('', 304, {'ETag': resp.headers['ETag']})
+                return resp
+            return wrapper
+        return decorator
+
+    def _key(self, endpoint, view_args):
+        args = sorted(request.args.items(multi=True))
+        # Schools share the store (and may share generation stamps), never entries
+        return json.dumps([current_tenant(), endpoint, sorted(view_args.items()), args])
+
+    def _count(self, endpoint, field):
+        with self._stats_lock:
+            self._stats[endpoint][field] += 1
+
+    def stats(self):
+        """Per-endpoint counters for this worker, with hit rate (304s count as hits)"""
+        with self._stats_lock:
+            result = {}
+            for endpoint, counts in self._stats.items():
+                total = counts['hits'] + counts['misses'] + counts['not_modified']
+                served = counts['hits'] + counts['not_modified']
+                result[endpoint] = dict(counts, hit_rate=round(served / total, 3) if total else 0.0)
+            return result
+
+    def clear(self):
+        if self.store is not None:
+            self.store.clear()
+
+response_cache = ResponseCache()
@@ -0,0 +1,92 @@
+from datetime import datetime
+from sqlalchemy import select, func, or_, and_
+from models import db, InventoryLog, User, Issue, Teacher
+
+PAGE_SIZE = 25
+
+def get_item_history(item, before=None, balance=None, limit=PAGE_SIZE):
+    """
+    One page of an item's InventoryLog, newest first.
+
+    Keyset pagination on (created_at, id) so every page is a range scan of
+    idx_inv_item_created, however deep the history. `before` is the
+    (created_at, id) of the last row already shown and `balance` the stock
+    level just before that row (both come from the previous page's cursor).
+    The first page starts from the item's current stock_on_hand.
+
+    Returns (rows, next_cursor). next_cursor is None on the last page.
+    """
+    if balance is None:
+        balance = item.stock_on_hand
+
+    log = InventoryLog.__table__
+    query = select(log).where(log.c.item_id == item.id)
+    if before is not None:
+        before_created, before_id = before
+        query = query.where(or_(
+            log.c.created_at < before_created,
+            and_(log.c.created_at == before_created, log.c.id < before_id)
+        ))
+    page = query.order_by(log.c.created_at.desc(), log.c.id.desc()).limit(limit + 1).subquery()
+
+    # Stock after each row = balance at the top of the page minus every newer delta on this page
+    newer = func.sum(page.c.delta_qty).over(
+        order_by=(page.c.created_at.desc(), page.c.id.desc()),
+        rows=(None, -1)
+    )
+    rows = db.session.execute(
+        select(page, (balance - func.coalesce(newer, 0)).label('balance_after'))
+        .order_by(page.c.created_at.desc(), page.c.id.desc())
+    ).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = {
+            'before_created': last.created_at.isoformat(),
+            'before_id': last.id,
+            'balance': last.balance_after - last.delta_qty
+        }
+
+    users, issues = resolve_refs(rows)
+    history = []
+    for row in rows:
+        entry = dict(row._mapping)
+        entry['user_name'] = users.get(row.user_id)
+        entry['teacher_name'] = issues.get(row.ref_id) if row.ref_type == 'issue' else None
+        history.append(entry)
+    return history, next_cursor
+
+def resolve_refs(rows):
+    """Bulk-loads user names and issue teachers for a page of log rows (one query each)"""
+    user_ids = {r.user_id for r in rows if r.user_id}
+    issue_ids = {r.ref_id for r in rows if r.ref_type == 'issue' and r.ref_id}
+
+    users = {}
+    if user_ids:
+        users = dict(db.session.execute(
+            select(User.id, User.name).where(User.id.in_(user_ids))
+        ).all())
+
+    issues = {}
+    if issue_ids:
+        issues = dict(db.session.execute(
+            select(Issue.id, Teacher.name).join(Teacher, Issue.teacher_id == Teacher.id)
+            .where(Issue.id.in_(issue_ids))
+        ).all())
+    return users, issues
+
+def parse_cursor(args):
+    """
+    Reads a history cursor from request args; returns (before, balance).
+    The three fields come together; a partial or malformed cursor raises ValueError
+    (a missing balance would silently restart the running totals from current stock).
+    """
+    fields = [args.get(name) for name in ('before_created', 'before_id', 'balance')]
+    if not any(fields):
+        return None, None
+    if not all(fields):
+        raise ValueError("Incomplete history cursor")
+    created, before_id, balance = fields
+    return (datetime.fromisoformat(created), int(before_id)), int(balance)
@@ -1,14 +1,18 @@
 from models import db, Item, InventoryLog
+from services.reorder import check_reorder
+from services.cache import bump_generation
 
 def adjust_stock(item_id, delta_qty, event_type, ref_type=None, ref_id=None, note=None, user_id=None):
     """
     Central function to modify stock. 
-    Updates Item.stock_on_hand and creates an InventoryLog entry.
+    Updates Item.stock_on_hand, creates an InventoryLog entry and
+    re-evaluates the reorder threshold for this item only.
     """
     item = Item.query.get(item_id)
     if not item:
         raise ValueError(f"Item {item_id} not found")
 
+    previous_stock = item.stock_on_hand
     item.stock_on_hand += delta_qty
     
     log = InventoryLog(
@@ -21,4 +25,6 @@ def adjust_stock(item_id, delta_qty, event_type, ref_type=None, ref_id=None, not
         user_id=user_id
     )
     db.session.add(log)
+    check_reorder(item, previous_stock=previous_stock)
+    bump_generation('items')
     return item
@@ -0,0 +1,303 @@
+import os
+import json
+import uuid
+import threading
+import traceback
+from datetime import datetime, timedelta
+from flask import abort
+from sqlalchemy import select, update, func
+from sqlalchemy.orm import Session
+from werkzeug.utils import import_string
+from models import db, Job
+from services.tenancy import current_tenant, tenant_context
+
+# How often the dispatcher looks for queued jobs when not woken by submit()
+POLL_SECONDS = 2
+# A running job whose worker stopped heartbeating this long ago was interrupted
+STALE_SECONDS = 60
+# Give up on a job after this many (interrupted) runs
+MAX_ATTEMPTS = 3
+
+class JobContext:
+    """
+    Passed to handlers. Progress and output are written on their own connection
+    and committed immediately, so pollers see them while the job is still running.
+    The queue lives in the default database; handlers run bound to the job's school.
+    """
+
+    def __init__(self, job_id, params):
+        self.job_id = job_id
+        self.params = params
+
+    def _update(self, **values):
+        values['heartbeat_at'] = datetime.utcnow()
+        with db.default_engine.begin() as conn:
+            conn.execute(update(Job.__table__).where(Job.__table__.c.id == self.job_id).values(**values))
+
+    def progress(self, percent, message=None):
+        values = {'progress': max(0, min(100, int(percent)))}
+        if message is not None:
+            values['message'] = message[:255]
+        self._update(**values)
+
+    def complete(self, message=None):
+        """
+        Records success before the handler returns, for a last step that may end
+        this worker (a deploy reloading the app). The job is no longer 'running',
+        so reclaim_stale() won't pick it up if the process dies.
+        """
+        values = {'status': 'succeeded', 'progress': 100, 'finished_at': datetime.utcnow()}
+        if message is not None:
+            values['message'] = message[:255]
+        self._update(**values)
+
+    def log(self, text):
+        if not text.endswith('\n'):
+            text += '\n'
+        self._update(output=Job.__table__.c.output + text)
+
+class JobRunner:
+    """
+    Persistent job queue: rows in the `job` table, executed by a small pool of
+    daemon threads in each worker process. Claiming is a conditional UPDATE, so
+    several workers can share the queue and per-type concurrency limits hold
+    across all of them.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.max_workers = 2
+        self.job_types = {}  # job_type -> (handler import name, concurrency, resumable)
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._active = 0
+        self._dispatcher = None
+
+    def init_app(self, app):
+        self.app = app
+        self.max_workers = app.config.get('JOBS_MAX_WORKERS', 2)
+
+    def register(self, job_type, handler, concurrency=1, resumable=True):
+        """
+        `handler` is an import string, resolved when the job runs (keeps heavy modules lazy).
+        Interrupted jobs of a type that isn't `resumable` are failed instead of requeued.
+        """
+        self.job_types[job_type] = (handler, concurrency, resumable)
+
+    # --- Queue ---
+
+    def submit(self, job_type, **params):
+        if job_type not in self.job_types:
+            raise ValueError(f"Unknown job type '{job_type}'")
+        job = Job(job_type=job_type, params=json.dumps(params), tenant=current_tenant())
+        # One queue for all schools, whichever database the request is bound to
+        with Session(db.default_engine, expire_on_commit=False) as session:
+            session.add(job)
+            session.commit()
+        # Wake before start(): an idle dispatcher re-checks the flag before exiting
+        self._wake.set()
+        self.start()
+        return job
+
+    def resume(self):
+        """
+        Startup hook: reclaims jobs whose worker died mid-run and starts the
+        dispatcher if anything is waiting. Returns the number of requeued jobs.
+        """
+        requeued = self.reclaim_stale()
+        if self._has_work():
+            self.start()
+        return requeued
+
+    def reclaim_stale(self):
+        """
+        Running jobs whose worker stopped heartbeating STALE_SECONDS ago were interrupted:
+        requeues them (fails those of non-resumable types). Also run on every dispatcher
+        tick: a recycled worker's replacement starts within seconds, long before its
+        jobs look stale, and until reclaimed they hold their type's concurrency slot.
+        Returns the number of requeued jobs.
+        """
+        table = Job.__table__
+        now = datetime.utcnow()
+        cutoff = now - timedelta(seconds=STALE_SECONDS)
+        stale = (table.c.status == 'running', table.c.heartbeat_at < cutoff)
+        # Checked on a read first: most ticks find nothing and shouldn't take the write lock
+        with db.default_engine.connect() as conn:
+            if not conn.execute(select(func.count()).select_from(table).where(*stale)).scalar():
+                return 0
+
+        once = [job_type for job_type, (_, _, resumable) in self.job_types.items() if not resumable]
+        with db.default_engine.begin() as conn:
+            conn.execute(
+                update(table)
+                .where(*stale, table.c.job_type.in_(once))
+                .values(status='failed', owner=None, finished_at=now, message='Interrupted',
+                        error='Interrupted while running; this job type is not resumed automatically')
+            )
+            return conn.execute(
+                update(table)
+                .where(*stale)
+                .values(status='queued', owner=None, message='Resumed after interruption')
+            ).rowcount
+
+    def claim_next(self):
+        """Atomically moves one runnable queued job to running for this worker; returns its id or None"""
+        table = Job.__table__
+        with db.default_engine.connect() as conn:
+            candidates = conn.execute(
+                select(table.c.id, table.c.job_type)
+                .where(table.c.status == 'queued')
+                .order_by(table.c.id).limit(20)
+            ).all()
+
+        for job_id, job_type in candidates:
+            concurrency = self.job_types.get(job_type, (None, 1, True))[1]
+            running = select(func.count()).select_from(table).where(
+                table.c.job_type == job_type, table.c.status == 'running'
+            ).scalar_subquery()
+            now = datetime.utcnow()
+            with db.default_engine.begin() as conn:
+                claimed = conn.execute(
+                    update(table)
+                    .where(table.c.id == job_id, table.c.status == 'queued', running < concurrency)
+                    .values(status='running', owner=self.owner, attempts=table.c.attempts + 1,
+                            started_at=now, heartbeat_at=now)
+                ).rowcount
+            if claimed:
+                return job_id
+        return None
+
+    def get(self, job_id):
+        """Detached Job row (any school), or None"""
+        with Session(db.default_engine, expire_on_commit=False) as session:
+            return session.get(Job, job_id)
+
+    def get_or_404(self, job_id):
+        """Job for a route: other schools' jobs are a 404 like missing ones"""
+        job = self.get(job_id)
+        if job is None or job.tenant != current_tenant():
+            abort(404)
+        return job
+
+    def run_job(self, job_id):
+        """Executes a claimed job in the current thread (needs an app context)"""
+        job = self.get(job_id)
+        params = json.loads(job.params or '{}')
+        handler_name = self.job_types.get(job.job_type, (None, 1, True))[0]
+        ctx = JobContext(job_id, params)
+        try:
+            if handler_name is None:
+                raise ValueError(f"No handler registered for job type '{job.job_type}'")
+            if job.attempts > MAX_ATTEMPTS:
+                raise RuntimeError(f"Gave up after {job.attempts - 1} interrupted attempts")
+            with tenant_context(job.tenant):
+                try:
+                    import_string(handler_name)(ctx, **params)
+                finally:
+                    db.session.rollback()
+            status, error = 'succeeded', None
+        except Exception:
+            status, error = 'failed', traceback.format_exc()
+
+        values = {'status': status, 'error': error, 'finished_at': datetime.utcnow()}
+        if status == 'succeeded':
+            values['progress'] = 100
+        ctx._update(**values)
+
+    def run_pending(self):
+        """Runs every runnable queued job synchronously (tests, CLI). Returns how many ran."""
+        count = 0
+        while True:
+            job_id = self.claim_next()
+            if job_id is None:
+                return count
+            self.run_job(job_id)
+            count += 1
+
+    # --- Threads ---
+
+    def start(self):
+        with self._lock:
+            if self._dispatcher is None or not self._dispatcher.is_alive():
+                self._dispatcher = threading.Thread(target=self._dispatch_loop, name='job-dispatcher', daemon=True)
+                self._dispatcher.start()
+
+    def _dispatch_loop(self):
+        """Runs while there is work; exits when idle and is restarted by submit()/resume()"""
+        while True:
+            self._wake.wait(POLL_SECONDS)
+            self._wake.clear()
+            pending = True
+            try:
+                with self.app.app_context():
+                    self._heartbeat()
+                    self.reclaim_stale()
+                    while self._has_capacity():
+                        job_id = self.claim_next()
+                        if job_id is None:
+                            break
+                        self._spawn(job_id)
+                    pending = self._has_work()
+                    db.session.remove()
+            except Exception:
+                # DB locked, tables being recreated, ...: try again next tick
+                traceback.print_exc()
+
+            with self._lock:
+                if not pending and not self._active and not self._wake.is_set():
+                    self._dispatcher = None
+                    return
+
+    def _has_work(self):
+        """
+        Queued jobs, or jobs running in other workers: if one of those dies, its jobs
+        are only reclaimed by a dispatcher that is still ticking.
+        """
+        table = Job.__table__
+        elsewhere = (table.c.status == 'running') & ((table.c.owner != self.owner) | (table.c.owner.is_(None)))
+        with db.default_engine.connect() as conn:
+            return conn.execute(
+                select(func.count()).select_from(table).where((table.c.status == 'queued') | elsewhere)
+            ).scalar() > 0
+
+    def _has_capacity(self):
+        with self._lock:
+            return self._active < self.max_workers
+
+    def _spawn(self, job_id):
+        with self._lock:
+            self._active += 1
+        threading.Thread(target=self._worker, args=(job_id,), name=f'job-{job_id}', daemon=True).start()
+
+    def _worker(self, job_id):
+        try:
+            with self.app.app_context():
+                self.run_job(job_id)
+                db.session.remove()
+        finally:
+            with self._lock:
+                self._active -= 1
+            self._wake.set()
+
+    def _heartbeat(self):
+        with self._lock:
+            if not self._active:
+                return
+        table = Job.__table__
+        with db.default_engine.begin() as conn:
+            conn.execute(
+                update(table)
+                .where(table.c.owner == self.owner, table.c.status == 'running')
+                .values(heartbeat_at=datetime.utcnow())
+            )
+
+    def read_output(self, job_id, offset=0):
+        """Output written after `offset` characters (for incremental polling/streaming)"""
+        table = Job.__table__
+        with db.default_engine.connect() as conn:
+            return conn.execute(
+                select(func.substr(table.c.output, offset + 1)).where(table.c.id == job_id)
+            ).scalar() or ''
+
+job_runner = JobRunner()
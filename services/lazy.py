@@ -0,0 +1,58 @@
+import threading
+from werkzeug.utils import cached_property, import_string
+
+class LazyView:
+    """
+    View function imported on first request (Flask's "lazily loading views" pattern).
+    Keeps rarely used, import-heavy modules like the deploy webhook out of worker startup.
+    """
+
+    def __init__(self, import_name):
+        self.__module__, self.__name__ = import_name.rsplit('.', 1)
+        self.import_name = import_name
+
+    @cached_property
+    def view(self):
+        return import_string(self.import_name)
+
+    def __call__(self, *args, **kwargs):
+        return self.view(*args, **kwargs)
+
+class LazySocketIO:
+    """
+    Defers importing flask_socketio (and python-socketio/engineio) until something needs it:
+    a request under /socket.io or socketio.run() in local development.
+    """
+
+    def __init__(self, **options):
+        self.options = options
+        self.app = None
+        self._server = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        wsgi_app = app.wsgi_app
+
+        def dispatch(environ, start_response):
+            if environ.get('PATH_INFO', '').startswith('/socket.io'):
+                self.get()
+                # SocketIO has now wrapped app.wsgi_app with its own middleware
+                return app.wsgi_app(environ, start_response)
+            return wsgi_app(environ, start_response)
+
+        app.wsgi_app = dispatch
+
+    @property
+    def loaded(self):
+        return self._server is not None
+
+    def get(self):
+        with self._lock:
+            if self._server is None:
+                from flask_socketio import SocketIO
+                self._server = SocketIO(self.app, **self.options)
+            return self._server
+
+    def run(self, app, **kwargs):
+        self.get().run(app, **kwargs)
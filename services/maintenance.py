@@ -0,0 +1,41 @@
+from models import db, User, Department, Teacher, Item, Job, IdSequence
+from services.cache import response_cache, bump_generation
+
+def reset_database(ctx):
+    """
+    Job handler: drops and recreates every table except the job queue and the id
+    sequences, then seeds demo data.
+    Runs against the database of the school that submitted it (Job.tenant).
+    """
+    # Sequences keep counting: other workers still hold blocks reserved before the
+    # reset, so restarting at 1 would hand out their values a second time
+    kept = (Job.__tablename__, IdSequence.__tablename__)
+    tables = [t for t in db.metadata.sorted_tables if t.name not in kept]
+    ctx.progress(10, "Dropping tables")
+    db.metadata.drop_all(bind=db.engine, tables=tables)
+    ctx.progress(40, "Creating tables")
+    db.metadata.create_all(bind=db.engine, tables=tables)
+
+    ctx.progress(70, "Seeding")
+    db.session.add(User(name="Admin", role="admin"))
+    math = Department(name="Math")
+    sci = Department(name="Science")
+    eng = Department(name="English")
+    db.session.add_all([math, sci, eng])
+    db.session.commit()
+
+    db.session.add_all([
+        Teacher(name="Mr. Anderson", email="anderson@school.com", department_id=math.id),
+        Teacher(name="Ms. Frizzle", email="frizzle@school.com", department_id=sci.id),
+        Teacher(name="Mr. Keating", email="keating@school.com", department_id=eng.id)
+    ])
+
+    db.session.add_all([
+        Item(name="Whiteboard Marker (Red)", sku="WBM-R", stock_on_hand=50, barcode="SS-100001"),
+        Item(name="A4 Paper Ream", sku="PPR-A4", stock_on_hand=100, barcode="SS-100002"),
+        Item(name="Stapler", sku="STP-01", stock_on_hand=10, barcode="SS-100003")
+    ])
+    bump_generation('teachers', 'departments', 'items')
+    db.session.commit()
+    response_cache.clear()
+    ctx.log("Database reset and seeded")
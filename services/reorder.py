@@ -0,0 +1,114 @@
+import math
+from datetime import datetime, timedelta
+from sqlalchemy import func, select, insert, literal
+from sqlalchemy.orm import joinedload
+from models import db, Item, InventoryLog, ReorderAlert
+
+# Consumption window used for the days-of-cover forecast
+RATE_WINDOW_DAYS = 30
+# Suggested orders aim to bring stock up to this many days of cover
+TARGET_COVER_DAYS = 30
+
+def is_low(stock, reorder_level):
+    # Same rule as the red dot in hx/item_search.html
+    return stock <= reorder_level
+
+def check_reorder(item, previous_stock=None):
+    """
+    Re-evaluates the reorder threshold for a single item after its stock changed.
+    Opens an alert when the item drops to/below reorder_level and clears it when restocked.
+    Only touches the alert rows of this item (indexed), never the item table.
+    Caller commits.
+    """
+    now_low = is_low(item.stock_on_hand, item.reorder_level)
+    was_low = previous_stock is None or is_low(previous_stock, item.reorder_level)
+    if not now_low and not was_low:
+        return None
+
+    alert = ReorderAlert.query.filter_by(item_id=item.id, cleared_at=None).first()
+    if now_low:
+        if alert is None:
+            alert = ReorderAlert(item_id=item.id, stock_on_hand=item.stock_on_hand, reorder_level=item.reorder_level)
+            db.session.add(alert)
+        else:
+            alert.stock_on_hand = item.stock_on_hand
+            alert.reorder_level = item.reorder_level
+    elif alert is not None:
+        alert.stock_on_hand = item.stock_on_hand
+        alert.cleared_at = datetime.utcnow()
+    return alert
+
+def backfill_alerts(conn):
+    """
+    Opens alerts for every item already at/below its reorder level. Runs once, when
+    the reorder_alert table is first created on an existing database (services.startup);
+    from then on check_reorder() keeps the set current.
+    """
+    item = Item.__table__
+    low = select(item.c.id, item.c.stock_on_hand, item.c.reorder_level, literal(datetime.utcnow())).where(
+        item.c.stock_on_hand <= item.c.reorder_level
+    )
+    return conn.execute(insert(ReorderAlert.__table__).from_select(
+        ['item_id', 'stock_on_hand', 'reorder_level', 'raised_at'], low
+    )).rowcount
+
+def get_consumption_rates(item_ids, days=RATE_WINDOW_DAYS):
+    """Average daily issued quantity per item over the last `days` days: {item_id: rate}"""
+    if not item_ids:
+        return {}
+    since = datetime.utcnow() - timedelta(days=days)
+    rows = db.session.query(
+        InventoryLog.item_id, func.sum(-InventoryLog.delta_qty)
+    ).filter(
+        InventoryLog.item_id.in_(item_ids),
+        InventoryLog.created_at >= since,
+        InventoryLog.event_type == "ISSUE"
+    ).group_by(InventoryLog.item_id).all()
+    return {item_id: (qty or 0) / days for item_id, qty in rows}
+
+def days_of_cover(stock, daily_rate):
+    if not daily_rate:
+        return None
+    return max(stock, 0) / daily_rate
+
+def suggested_qty(stock, reorder_level, daily_rate):
+    target = max(2 * reorder_level, math.ceil(daily_rate * TARGET_COVER_DAYS))
+    return max(target - stock, 0)
+
+def get_low_stock_ids():
+    """The live 'below reorder level' set, read from open alerts"""
+    rows = db.session.query(ReorderAlert.item_id).filter(ReorderAlert.cleared_at.is_(None)).all()
+    return {item_id for (item_id,) in rows}
+
+def get_reorder_report():
+    """
+    Rows for every item currently at/below its reorder level, most urgent first.
+    Reads only open alerts and the logs of those items.
+    """
+    open_alerts = db.session.query(ReorderAlert, Item).join(Item).filter(
+        ReorderAlert.cleared_at.is_(None)
+    ).all()
+    rates = get_consumption_rates([item.id for _, item in open_alerts])
+
+    report = []
+    for alert, item in open_alerts:
+        rate = rates.get(item.id, 0)
+        report.append({
+            'item': item,
+            'stock_on_hand': item.stock_on_hand,
+            'reorder_level': item.reorder_level,
+            'daily_rate': rate,
+            'days_of_cover': days_of_cover(item.stock_on_hand, rate),
+            'suggested_qty': suggested_qty(item.stock_on_hand, item.reorder_level, rate),
+            'raised_at': alert.raised_at
+        })
+    # No consumption history sorts last; otherwise least cover first
+    report.sort(key=lambda r: (r['days_of_cover'] is None, r['days_of_cover'] or 0, r['stock_on_hand']))
+    return report
+
+def get_alert_feed(limit=20):
+    """Most recent alert events (raised and cleared), newest first: a cleared alert sorts by when it cleared"""
+    happened_at = func.coalesce(ReorderAlert.cleared_at, ReorderAlert.raised_at)
+    return ReorderAlert.query.options(joinedload(ReorderAlert.item)).order_by(
+        happened_at.desc(), ReorderAlert.id.desc()
+    ).limit(limit).all()
@@ -0,0 +1,307 @@
+import os
+import time
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+from models import db
+from services.tenancy import tenant_instance_path, tenant_engines
+
+# Pages copied per backup step; the source is only read-locked for one step at a time
+BACKUP_PAGES = 1024
+
+class ReportingDB:
+    """
+    Separate connections for reports/dashboards so long analytical reads never
+    share the checkout connection pool or hold a snapshot on the live WAL.
+
+    REPORTING_DB_MODE:
+      'snapshot' - read-only engine on a copy refreshed with the SQLite backup API
+                   every REPORTING_SNAPSHOT_SECONDS (default; fully isolated from the WAL)
+      'readonly' - read-only (mode=ro, query_only) engine on the live database file
+      'primary'  - the normal db.session (also used for in-memory databases)
+
+    Snapshots are taken by a background thread, never inside a request: until a
+    school has a snapshot (or when it has gone unread long enough to be stale)
+    its reports read the live file read-only and the thread is woken to take one.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.mode = 'snapshot'
+        self.snapshot_seconds = 60
+        self._states = {}  # primary database path -> _SnapshotState (one per school)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def init_app(self, app):
+        self.app = app
+        self.mode = app.config.get('REPORTING_DB_MODE', 'snapshot')
+        if self.mode not in ('snapshot', 'readonly', 'primary'):
+            raise ValueError(f"Unknown REPORTING_DB_MODE '{self.mode}'")
+        self.snapshot_seconds = app.config.get('REPORTING_SNAPSHOT_SECONDS', 60)
+
+    @property
+    def snapshot_path(self):
+        """Snapshot file of the current school (instance/reports_snapshot.db by default)"""
+        return os.path.join(tenant_instance_path(), 'reports_snapshot.db')
+
+    @contextmanager
+    def session(self):
+        """Read-only Session for report queries"""
+        engine = self.engine()
+        if engine is None:
+            yield db.session
+            return
+        session = Session(bind=engine)
+        try:
+            yield session
+        finally:
+            session.close()
+
+    def engine(self):
+        """Engine for the current mode, or None to use the primary session"""
+        path = primary_path()
+        if path is None or self.mode == 'primary':
+            return None
+        with self._lock:
+            state = self._state(path)
+            target = path
+            if self.mode == 'snapshot':
+                state.read_at = time.time()
+                # A snapshot the refresher has let go stale (nobody read it) is not served
+                if time.time() - state.snapshot_at <= 2 * self.snapshot_seconds \
+                        and os.path.exists(state.snapshot_path):
+                    target = state.snapshot_path
+                else:
+                    self._wake.set()
+            if state.engine is None or state.engine_target != target:
+                if state.engine is not None:
+                    state.engine.dispose()
+                state.engine = readonly_engine(target)
+                state.engine_target = target
+            engine = state.engine
+        if self.mode == 'snapshot':
+            self.start()
+        return engine
+
+    def refresh_snapshot(self):
+        """Takes the current school's snapshot now (tests, CLI)"""
+        path = primary_path()
+        if path is not None:
+            with self._lock:
+                state = self._state(path)
+            self._refresh_snapshot(state)
+
+    def _state(self, path):
+        state = self._states.get(path)
+        if state is None:
+            state = self._states[path] = _SnapshotState(path, self.snapshot_path)
+        return state
+
+    def _refresh_snapshot(self, state):
+        """
+        Copies the live DB into a temp file and swaps it in; readers keep their old file until reconnect.
+        Runs without the ReportingDB lock (only the swap takes it), so reports keep being served.
+        """
+        with state.refresh_lock:
+            start = time.perf_counter()
+            # Unique per refresh: another worker process may be refreshing the same school
+            fd, tmp_path = tempfile.mkstemp(prefix='reports_snapshot.', suffix='.tmp',
+                                            dir=os.path.dirname(state.snapshot_path))
+            os.close(fd)
+            try:
+                src = sqlite3.connect(state.path)
+                dst = sqlite3.connect(tmp_path)
+                try:
+                    src.backup(dst, pages=BACKUP_PAGES)
+                    # Single-file rollback journal: read-only connections need no -wal/-shm,
+                    # and swapping the file below can't pull one out from under a reader
+                    dst.execute("PRAGMA journal_mode=DELETE")
+                finally:
+                    dst.close()
+                    src.close()
+
+                with self._lock:
+                    if state.engine is not None and state.engine_target == state.snapshot_path:
+                        # Checked-out connections finish on the old file (still open by inode)
+                        state.engine.dispose()
+                        state.engine = None
+                    os.replace(tmp_path, state.snapshot_path)
+                    state.snapshot_at = time.time()
+                    state.last_snapshot_ms = round((time.perf_counter() - start) * 1000, 2)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    # --- Background refresh ---
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name='reports-snapshot', daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            self._wake.wait(self.snapshot_seconds)
+            self._wake.clear()
+            for state in self._due():
+                try:
+                    self._refresh_snapshot(state)
+                except Exception:
+                    # Locked / school database gone: next tick
+                    pass
+
+    def _due(self):
+        """Snapshots read since they were taken and older than REPORTING_SNAPSHOT_SECONDS (or missing)"""
+        now = time.time()
+        with self._lock:
+            return [state for state in self._states.values()
+                    if state.read_at > state.snapshot_at
+                    and (now - state.snapshot_at >= self.snapshot_seconds
+                         or not os.path.exists(state.snapshot_path))]
+
+    def metrics(self):
+        path = primary_path()
+        with self._lock:
+            state = self._states.get(path)
+        snapshot_at = state.snapshot_at if state else 0.0
+        age = round(time.time() - snapshot_at, 1) if snapshot_at else None
+        return {
+            'mode': self.mode,
+            'snapshot_age_seconds': age if self.mode == 'snapshot' else None,
+            'last_snapshot_ms': state.last_snapshot_ms if state else None
+        }
+
+class _SnapshotState:
+    def __init__(self, path, snapshot_path):
+        self.path = path
+        self.snapshot_path = snapshot_path
+        self.engine = None
+        self.engine_target = None
+        self.snapshot_at = 0.0
+        self.read_at = 0.0
+        self.last_snapshot_ms = None
+        # One refresh at a time per school (background thread vs. refresh_snapshot())
+        self.refresh_lock = threading.Lock()
+
+def primary_path(engine=None):
+    """Filesystem path of the primary SQLite database, or None (in-memory / not SQLite)"""
+    url = (engine if engine is not None else db.engine).url
+    if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:'):
+        return None
+    return url.database
+
+def readonly_engine(path):
+    engine = create_engine(f"sqlite:///file:{path}?mode=ro&uri=true")
+
+    @event.listens_for(engine, "connect")
+    def set_query_only(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA query_only = ON")
+        cursor.close()
+
+    return engine
+
+class CheckpointScheduler:
+    """
+    Background thread that checkpoints the primary WAL every WAL_CHECKPOINT_SECONDS
+    (the default database and every school database currently open).
+    PASSIVE normally; TRUNCATE once the WAL passes WAL_TRUNCATE_BYTES so it shrinks again.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.interval = 60
+        self.truncate_bytes = 16 * 1024 * 1024
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.stats = {
+            'checkpoints': 0,
+            'last_mode': None,
+            'last_duration_ms': None,
+            'max_duration_ms': None,
+            'last_wal_bytes_before': None,
+            'last_wal_bytes_after': None,
+            'last_busy': None,
+            'last_run_at': None
+        }
+
+    def init_app(self, app):
+        self.app = app
+        self.interval = app.config.get('WAL_CHECKPOINT_SECONDS', 60)
+        self.truncate_bytes = app.config.get('WAL_TRUNCATE_BYTES', self.truncate_bytes)
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._loop, name='wal-checkpoint', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                with self.app.app_context():
+                    self.checkpoint_all()
+            except Exception:
+                # Locked / busy: next tick
+                pass
+
+    def checkpoint_all(self):
+        engines = [db.default_engine] + [engine for _, engine in tenant_engines.open_engines()]
+        for engine in engines:
+            try:
+                self.checkpoint(engine)
+            except Exception:
+                # One busy school doesn't hold up the others
+                pass
+
+    def checkpoint(self, engine=None):
+        engine = engine if engine is not None else db.engine
+        path = primary_path(engine)
+        if path is None:
+            return None
+        before = wal_size(path)
+        mode = 'TRUNCATE' if before >= self.truncate_bytes else 'PASSIVE'
+        start = time.perf_counter()
+        with engine.connect() as conn:
+            busy, log_frames, checkpointed = conn.execute(text(f"PRAGMA wal_checkpoint({mode})")).one()
+        duration = round((time.perf_counter() - start) * 1000, 2)
+
+        with self._lock:
+            self.stats['checkpoints'] += 1
+            self.stats['last_mode'] = mode
+            self.stats['last_duration_ms'] = duration
+            self.stats['max_duration_ms'] = max(duration, self.stats['max_duration_ms'] or 0)
+            self.stats['last_wal_bytes_before'] = before
+            self.stats['last_wal_bytes_after'] = wal_size(path)
+            self.stats['last_busy'] = bool(busy)
+            self.stats['last_run_at'] = time.time()
+        return {'mode': mode, 'busy': bool(busy), 'log_frames': log_frames,
+                'checkpointed': checkpointed, 'duration_ms': duration}
+
+    def metrics(self):
+        path = primary_path()
+        with self._lock:
+            stats = dict(self.stats)
+        stats['wal_bytes'] = wal_size(path) if path else None
+        stats['interval_seconds'] = self.interval
+        return stats
+
+def wal_size(path):
+    try:
+        return os.path.getsize(path + '-wal')
+    except OSError:
+        return 0
+
+reporting_db = ReportingDB()
+checkpoint_scheduler = CheckpointScheduler()
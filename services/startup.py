@@ -0,0 +1,73 @@
+import os
+import hashlib
+from sqlalchemy import text, event, inspect
+from models import db, ReorderAlert
+from services.reorder import backfill_alerts
+from services.templating import precompile_templates
+from services.jobs import job_runner
+from services.reporting import checkpoint_scheduler
+
+def schema_fingerprint(metadata):
+    """Stable 31-bit hash of every table, column and index the models declare"""
+    parts = []
+    for table in sorted(metadata.tables.values(), key=lambda t: t.name):
+        columns = ','.join(c.name for c in table.columns)
+        indexes = ','.join(sorted(i.name for i in table.indexes))
+        parts.append(f"{table.name}:{columns}:{indexes}")
+    digest = hashlib.sha1('\n'.join(parts).encode()).hexdigest()
+    return int(digest[:8], 16) & 0x7FFFFFFF
+
+@event.listens_for(db.metadata, "after_drop")
+def clear_schema_fingerprint(target, connection, **kw):
+    # drop_all() (reset-db, tests) must make the next startup recreate the tables
+    connection.execute(text("PRAGMA user_version = 0"))
+
+def ensure_schema(engine=None):
+    """
+    Creates the tables only when the models changed since it last ran on `engine`
+    (default: the current database; services.tenancy passes each school's engine).
+    The fingerprint is kept in SQLite's PRAGMA user_version, so a fresh or
+    deleted database file (user_version 0) always gets its tables.
+    Returns True if create_all ran.
+    """
+    engine = engine if engine is not None else db.engine
+    fingerprint = schema_fingerprint(db.metadata)
+    with engine.connect() as conn:
+        current = conn.execute(text("PRAGMA user_version")).scalar()
+    if current == fingerprint:
+        return False
+
+    had_alerts = inspect(engine).has_table(ReorderAlert.__tablename__)
+    db.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        if not had_alerts:
+            # Existing databases: items already low would otherwise be missing from /reorder
+            backfill_alerts(conn)
+        conn.execute(text(f"PRAGMA user_version = {fingerprint}"))
+    return True
+
+def run_startup(app):
+    """
+    One-off work before serving. Each step can be turned off in config
+    (STARTUP_PRECOMPILE_TEMPLATES, STARTUP_ENSURE_SCHEMA, STARTUP_RESUME_JOBS,
+    STARTUP_WAL_CHECKPOINTS);
+    FLASK_TESTING skips all of it: tests build their own apps in temp folders
+    (tests.create_test_app) and never touch the instance folder.
+    """
+    if os.environ.get('FLASK_TESTING'):
+        return
+    with app.app_context():
+        os.makedirs(os.path.join(app.instance_path, 'signatures'), exist_ok=True)
+        os.makedirs(os.path.join(app.instance_path, 'barcodes'), exist_ok=True)
+
+        if app.config.get('STARTUP_PRECOMPILE_TEMPLATES', True):
+            # Compile all templates now (from the on-disk bytecode cache when warm)
+            precompile_templates(app)
+
+        if app.config.get('STARTUP_ENSURE_SCHEMA', True):
+            ensure_schema()
+        if app.config.get('STARTUP_RESUME_JOBS', True):
+            # Jobs interrupted by a worker recycle are requeued and picked up again
+            job_runner.resume()
+        if app.config.get('STARTUP_WAL_CHECKPOINTS', True):
+            checkpoint_scheduler.start()
@@ -0,0 +1,30 @@
+import os
+from flask import current_app, request
+from jinja2 import FileSystemBytecodeCache
+
+def configure_jinja(app):
+    """
+    Must run before anything touches app.jinja_env (it is created on first access).
+    Compiled templates are kept on disk so a recycled worker skips parsing/compiling.
+    """
+    cache_dir = os.path.join(app.instance_path, 'jinja_cache')
+    os.makedirs(cache_dir, exist_ok=True)
+    app.jinja_options = dict(app.jinja_options, bytecode_cache=FileSystemBytecodeCache(cache_dir))
+
+def precompile_templates(app):
+    """Loads every template once so the first real request finds it compiled in memory"""
+    env = app.jinja_env
+    names = env.list_templates()
+    for name in names:
+        env.get_template(name)
+    return len(names)
+
+def render_fragment(template_name, **context):
+    """
+    Renders an HTMX fragment straight from the Jinja environment.
+    Skips render_template's context processors and signals; fragments only get
+    `request` plus the environment globals (url_for, asset_url, ...).
+    """
+    template = current_app.jinja_env.get_template(template_name)
+    context.setdefault('request', request)
+    return template.render(context)
@@ -0,0 +1,203 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from flask import current_app, g, has_app_context, has_request_context, request, abort
+from flask.sessions import SecureCookieSessionInterface
+from sqlalchemy import create_engine
+from models import db
+
+# Tenant slugs double as directory names and subdomains
+TENANT_RE = re.compile(r'^[a-z0-9][a-z0-9-]{0,62}$')
+# WSGI environ key the middleware stores the resolved tenant under
+ENVIRON_KEY = 'school_store.tenant'
+TENANTS_DIR = 'tenants'
+
+def current_tenant():
+    """Slug of the school the current request/job belongs to, or None (single-school mode)"""
+    if not has_app_context():
+        return None
+    return g.get('tenant')
+
+@contextmanager
+def tenant_context(tenant):
+    """Binds db.session/db.engine to `tenant` for the rest of the app context (jobs, CLI, tests)"""
+    previous = g.get('tenant')
+    if previous != tenant:
+        db.session.remove()
+    g.tenant = tenant
+    try:
+        yield
+    finally:
+        if previous != tenant:
+            db.session.remove()
+        g.tenant = previous
+
+def tenant_instance_path(tenant=None):
+    """instance/tenants/<slug> for a school, the plain instance path otherwise"""
+    tenant = tenant if tenant is not None else current_tenant()
+    if tenant is None:
+        return current_app.instance_path
+    return os.path.join(current_app.instance_path, TENANTS_DIR, tenant)
+
+class TenantEngines:
+    """
+    One SQLite file per school (instance/tenants/<slug>/store.db). At most
+    TENANT_MAX_ENGINES engines stay open; the least recently used one is disposed
+    so a deployment with many schools doesn't hold a pool per school forever.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = False
+        self.max_engines = 16
+        self._engines = OrderedDict()
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.evicted = 0
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('TENANCY_ENABLED', False)
+        self.max_engines = app.config.get('TENANT_MAX_ENGINES', 16)
+        db.tenant_engine = self.current_engine
+        if self.enabled:
+            app.wsgi_app = TenantMiddleware(app.wsgi_app, app.config.get('TENANT_HOST_SUFFIX'),
+                                            app.config.get('TENANT_PATH_PREFIX', '/t'))
+            app.session_interface = TenantSessionInterface()
+            app.before_request(bind_request_tenant)
+            app.teardown_request(unbind_request_tenant)
+
+    def current_engine(self):
+        tenant = current_tenant()
+        if tenant is None:
+            return None
+        return self.get(tenant)
+
+    def get(self, tenant):
+        with self._lock:
+            engine = self._engines.get(tenant)
+            if engine is not None:
+                self._engines.move_to_end(tenant)
+                return engine
+        # Opened outside the lock: creating the schema on a new school's file can take a while
+        engine = self._open(tenant)
+        with self._lock:
+            existing = self._engines.get(tenant)
+            if existing is not None:
+                engine.dispose()
+                self._engines.move_to_end(tenant)
+                return existing
+            self._engines[tenant] = engine
+            self.opened += 1
+            while len(self._engines) > self.max_engines:
+                _, old = self._engines.popitem(last=False)
+                # Checked-out connections finish normally; the pool is just closed
+                old.dispose()
+                self.evicted += 1
+            return engine
+
+    def _open(self, tenant):
+        from services.startup import ensure_schema
+        if not TENANT_RE.match(tenant):
+            raise ValueError(f"Invalid tenant '{tenant}'")
+        path = os.path.join(self.app.instance_path, TENANTS_DIR, tenant)
+        os.makedirs(os.path.join(path, 'signatures'), exist_ok=True)
+        os.makedirs(os.path.join(path, 'barcodes'), exist_ok=True)
+        engine = create_engine('sqlite:///' + os.path.join(path, 'store.db'))
+        ensure_schema(engine)
+        return engine
+
+    def open_engines(self):
+        """Snapshot of the (tenant, engine) pairs currently open"""
+        with self._lock:
+            return list(self._engines.items())
+
+    def dispose_all(self):
+        with self._lock:
+            for engine in self._engines.values():
+                engine.dispose()
+            self._engines.clear()
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'open': list(self._engines),
+                'max_engines': self.max_engines,
+                'opened': self.opened,
+                'evicted': self.evicted
+            }
+
+class TenantMiddleware:
+    """
+    Resolves the school from the Host (<slug>.TENANT_HOST_SUFFIX) or a path prefix
+    (/t/<slug>/...). The prefix is moved into SCRIPT_NAME so url_for() keeps it.
+    """
+
+    def __init__(self, wsgi_app, host_suffix=None, path_prefix='/t'):
+        self.wsgi_app = wsgi_app
+        self.host_suffix = host_suffix
+        self.path_prefix = path_prefix.rstrip('/') if path_prefix else None
+
+    def __call__(self, environ, start_response):
+        tenant = None
+        if self.host_suffix:
+            host = environ.get('HTTP_HOST', '').split(':')[0].lower()
+            suffix = '.' + self.host_suffix.lstrip('.')
+            if host.endswith(suffix):
+                tenant = host[:-len(suffix)]
+
+        if tenant is None and self.path_prefix:
+            path = environ.get('PATH_INFO', '')
+            if path.startswith(self.path_prefix + '/'):
+                slug, _, rest = path[len(self.path_prefix) + 1:].partition('/')
+                if slug:
+                    tenant = slug
+                    environ['SCRIPT_NAME'] = environ.get('SCRIPT_NAME', '') + f"{self.path_prefix}/{slug}"
+                    environ['PATH_INFO'] = '/' + rest
+
+        environ[ENVIRON_KEY] = tenant
+        return self.wsgi_app(environ, start_response)
+
+class TenantSessionInterface(SecureCookieSessionInterface):
+    """
+    One session cookie per school. With path-prefix routing every school shares
+    the host, so a single cookie would carry the cart and user_id from /t/a/ to /t/b/.
+    The session is opened before bind_request_tenant() runs, so the school is
+    read from what TenantMiddleware resolved.
+    """
+
+    def _tenant(self):
+        tenant = request.environ.get(ENVIRON_KEY) if has_request_context() else None
+        # Unknown slugs are a 404 later; they never name a cookie
+        return tenant if tenant and TENANT_RE.match(tenant) else None
+
+    def get_cookie_name(self, app):
+        name = super().get_cookie_name(app)
+        tenant = self._tenant()
+        return f"{name}_{tenant}" if tenant else name
+
+    def get_cookie_path(self, app):
+        # /t/<slug> in path-prefix mode; host mode keeps the configured path
+        if self._tenant() and request.script_root:
+            return request.script_root
+        return super().get_cookie_path(app)
+
+def bind_request_tenant():
+    """before_request: binds the session to the resolved school; unknown schools are a 404"""
+    tenant = request.environ.get(ENVIRON_KEY)
+    if tenant is None:
+        return
+    allowed = current_app.config.get('TENANTS') or []
+    if not TENANT_RE.match(tenant) or tenant not in allowed:
+        abort(404)
+    g.tenant = tenant
+
+def unbind_request_tenant(exc=None):
+    # An app context pushed around the request (tests, CLI) outlives it: don't leak the school
+    if g.pop('tenant', None) is not None:
+        db.session.remove()
+
+tenant_engines = TenantEngines()
@@ -13,3 +13,10 @@ setTimeout(function () {
         } catch (e) { }
     });
 }, 3000);
+
+// Service Worker (precaches the checkout shell)
+if ('serviceWorker' in navigator) {
+    window.addEventListener('load', function () {
+        navigator.serviceWorker.register('/sw.js').catch(function () { });
+    });
+}
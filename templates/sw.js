@@ -0,0 +1,71 @@
+// Service Worker (rendered by /sw.js so it always knows the current asset fingerprints)
+const CACHE = 'storemgr-{{ version }}';
+const SHELL_URL = '{{ shell_url }}';
+const PRECACHE = {{ precache|tojson }};
+
+// Install: precache the checkout shell and our fingerprinted assets
+self.addEventListener('install', event => {
+    event.waitUntil(
+        caches.open(CACHE).then(cache => cache.addAll(PRECACHE)).then(() => self.skipWaiting())
+    );
+});
+
+// Activate: drop caches from previous builds
+self.addEventListener('activate', event => {
+    event.waitUntil(
+        caches.keys().then(keys => Promise.all(
+            keys.filter(key => key.startsWith('storemgr-') && key !== CACHE).map(key => caches.delete(key))
+        )).then(() => self.clients.claim())
+    );
+});
+
+// Serve from cache, refresh the cached copy in the background
+function staleWhileRevalidate(event, cacheKey) {
+    return caches.open(CACHE).then(cache => cache.match(cacheKey).then(cached => {
+        const network = fetch(event.request).then(response => {
+            if (response.ok || response.type === 'opaque') cache.put(cacheKey, response.clone());
+            return response;
+        });
+        if (cached) {
+            event.waitUntil(network.catch(() => { }));
+            return cached;
+        }
+        return network;
+    }));
+}
+
+// Always try the network; the cached copy is only the offline fallback
+function networkFirst(event, cacheKey) {
+    return caches.open(CACHE).then(cache => fetch(event.request).then(response => {
+        if (response.ok) cache.put(cacheKey, response.clone());
+        return response;
+    }).catch(() => cache.match(cacheKey).then(cached => cached || Promise.reject(new Error('offline')))));
+}
+
+self.addEventListener('fetch', event => {
+    const req = event.request;
+    if (req.method !== 'GET') return;
+    const url = new URL(req.url);
+
+    // Checkout page: it server-renders the teacher and item lists, so a cached copy
+    // would show the previous visit's data; only used when the network is down
+    if (req.mode === 'navigate' && url.origin === location.origin && url.pathname === SHELL_URL) {
+        event.respondWith(networkFirst(event, SHELL_URL));
+        return;
+    }
+
+    // Fingerprinted assets never change: cache first
+    if (url.origin === location.origin && url.pathname.startsWith('/assets/')) {
+        event.respondWith(caches.match(req).then(cached => cached || fetch(req).then(response => {
+            const copy = response.clone();
+            caches.open(CACHE).then(cache => cache.put(req, copy));
+            return response;
+        })));
+        return;
+    }
+
+    // Versioned CDN libraries (bootstrap, htmx, signature_pad)
+    if (url.origin !== location.origin && req.destination in { script: 1, style: 1, font: 1 }) {
+        event.respondWith(staleWhileRevalidate(event, req));
+    }
+});
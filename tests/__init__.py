@@ -1 +1,38 @@
 # Test package
+import os
+import shutil
+import tempfile
+
+# `import app` builds the module-level app: skip its database startup (schema,
+# job resume, WAL checkpoints) so a test run never opens instance/store.db
+os.environ.setdefault('FLASK_TESTING', '1')
+
+def create_test_app(**settings):
+    """
+    App with its own instance folder and SQLite database in a temp dir.
+    Tests push its context and create the tables; remove_test_app() cleans up.
+    """
+    from app import create_app
+    from config import Config
+
+    tmp = tempfile.mkdtemp()
+
+    class TestConfig(Config):
+        TESTING = True
+        INSTANCE_PATH = tmp
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tmp, 'store.db')
+
+    for name, value in settings.items():
+        setattr(TestConfig, name, value)
+    return create_app(TestConfig, startup=False)
+
+def remove_test_app(test_app):
+    """Closes the app's database connections (schools included) and deletes its instance folder"""
+    from models import db
+    from services.tenancy import tenant_engines
+
+    tenant_engines.dispose_all()
+    with test_app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+    shutil.rmtree(test_app.instance_path, ignore_errors=True)
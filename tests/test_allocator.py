@@ -0,0 +1,78 @@
+import unittest
+import threading
+from types import SimpleNamespace
+from app import db, Item
+from tests import create_test_app, remove_test_app
+from services.allocator import BlockAllocator, reserve_block, gs1_check_digit
+from services.barcodes import generate_barcode_value, is_valid_barcode_value
+from services.maintenance import reset_database
+
+class TestAllocator(unittest.TestCase):
+    def setUp(self):
+        self.flask_app = create_test_app()
+        self.ctx = self.flask_app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        self.ctx.pop()
+        remove_test_app(self.flask_app)
+
+    def test_reserve_block_is_contiguous(self):
+        self.assertEqual(reserve_block('test', 10), 1)
+        self.assertEqual(reserve_block('test', 10), 11)
+        self.assertEqual(reserve_block('other', 5), 1)
+
+    def test_reset_db_keeps_sequences_counting(self):
+        # Blocks other workers reserved before the reset must stay unique afterwards
+        held = BlockAllocator('sku', block_size=10)
+        held.next_value()
+        ctx = SimpleNamespace(progress=lambda *args: None, log=lambda text: None)
+        reset_database(ctx)
+        self.assertEqual(reserve_block('sku', 10), 11)
+        self.assertEqual(held.next_value(), 2)
+
+    def test_gs1_check_digit(self):
+        # GTIN-13 4006381333931
+        self.assertEqual(gs1_check_digit('400638133393'), '1')
+
+    def test_generated_barcodes_validate(self):
+        code = generate_barcode_value()
+        self.assertTrue(code.startswith('SS-'))
+        self.assertTrue(is_valid_barcode_value(code))
+        # Flip the check digit
+        bad = code[:-1] + str((int(code[-1]) + 1) % 10)
+        self.assertFalse(is_valid_barcode_value(bad))
+        # Legacy values are still accepted
+        self.assertTrue(is_valid_barcode_value('SS-100001'))
+
+    def test_scan_finds_manual_barcode_before_misread_check(self):
+        code = generate_barcode_value()
+        bad = code[:-1] + str((int(code[-1]) + 1) % 10)
+        db.session.add(Item(name="Manual Label", sku="MAN-01", barcode=bad))
+        db.session.commit()
+        client = self.flask_app.test_client()
+        self.assertIn(b'Manual Label', client.get(f'/hx/items/search?q={bad}').data)
+        other = code[:-1] + str((int(code[-1]) + 2) % 10)
+        self.assertIn(b'misread', client.get(f'/hx/items/search?q={other}').data)
+
+    def test_million_values_across_threads_are_unique(self):
+        allocator = BlockAllocator('bulk', block_size=10000)
+        n_threads, per_thread = 8, 125000
+        results = [None] * n_threads
+
+        def worker(idx):
+            with self.flask_app.app_context():
+                results[idx] = [allocator.next_value() for _ in range(per_thread)]
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(n_threads)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        values = set()
+        for chunk in results:
+            values.update(chunk)
+        self.assertEqual(len(values), n_threads * per_thread)
@@ -0,0 +1,124 @@
+import unittest
+from datetime import date, datetime, timedelta
+import numpy as np
+from app import db, User, Item, Teacher, Department
+from tests import create_test_app, remove_test_app
+from models import Issue, IssueLine
+from services import analytics
+from services.analytics import compute_analytics, get_consumption_analytics, group_median, rolling_mean
+from services.cache import bump_generation
+from services.reporting import reporting_db
+
+START = date(2024, 1, 1)  # A Monday in the spring term
+
+class TestAnalytics(unittest.TestCase):
+    def setUp(self):
+        self.flask_app = create_test_app()
+        self.app = self.flask_app.test_client()
+        self.ctx = self.flask_app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.mode = reporting_db.mode
+        reporting_db.mode = 'primary'
+        analytics._cache.clear()
+
+        user = User(name="Admin", role="admin")
+        dept = Department(name="English")
+        db.session.add_all([user, dept])
+        db.session.commit()
+        self.user = user
+        self.teachers = [Teacher(name=f"Teacher {n}", department_id=dept.id) for n in range(2)]
+        self.paper = Item(name="A4 Paper", sku="PPR-A4", stock_on_hand=1000)
+        db.session.add_all(self.teachers + [self.paper])
+        db.session.commit()
+
+    def tearDown(self):
+        reporting_db.mode = self.mode
+        db.session.remove()
+        self.ctx.pop()
+        remove_test_app(self.flask_app)
+
+    def add_issue(self, teacher, qty, day):
+        issue = Issue(teacher_id=teacher.id, user_id=self.user.id, signature_path="signatures/x.png",
+                      created_at=datetime.combine(START + timedelta(days=day), datetime.min.time()))
+        db.session.add(issue)
+        db.session.flush()
+        db.session.add(IssueLine(issue_id=issue.id, item_id=self.paper.id, qty=qty))
+
+    def test_weekly_curve_and_anomaly(self):
+        for week in range(8):
+            self.add_issue(self.teachers[0], 2, week * 7 + 1)
+            self.add_issue(self.teachers[1], 3, week * 7 + 2)
+        self.add_issue(self.teachers[0], 30, 7 * 5 + 3)  # 10x their usual week
+        db.session.commit()
+
+        report = get_consumption_analytics(START, START + timedelta(weeks=8))
+        item = report['items'][0]
+        self.assertEqual(item['name'], "A4 Paper")
+        self.assertEqual(item['weekly'], [5, 5, 5, 5, 5, 35, 5, 5])
+        self.assertEqual(item['total'], 70)
+        self.assertEqual(item['p50'], 5)
+        self.assertEqual(len(item['forecast']), analytics.FORECAST_WEEKS)
+        self.assertEqual(report['anomalies'], [{
+            'teacher_id': self.teachers[0].id, 'teacher': "Teacher 0",
+            'item_id': self.paper.id, 'item': "A4 Paper",
+            'week': (START + timedelta(weeks=5)).isoformat(), 'qty': 32.0, 'usual': 2.0
+        }])
+
+    def test_cached_per_range_until_stock_changes(self):
+        self.add_issue(self.teachers[0], 4, 1)
+        db.session.commit()
+        first = get_consumption_analytics(START, START + timedelta(weeks=2))
+        self.assertIs(get_consumption_analytics(START, START + timedelta(weeks=2)), first)
+        self.assertIsNot(get_consumption_analytics(START, START + timedelta(weeks=3)), first)
+
+        self.add_issue(self.teachers[0], 6, 2)
+        bump_generation('items')
+        db.session.commit()
+        self.assertEqual(get_consumption_analytics(START, START + timedelta(weeks=2))['items'][0]['total'], 10)
+
+    def test_cached_report_follows_the_snapshot(self):
+        reporting_db.mode = 'snapshot'
+        self.add_issue(self.teachers[0], 4, 1)
+        db.session.commit()
+        reporting_db.refresh_snapshot()
+        self.assertEqual(get_consumption_analytics(START, START + timedelta(weeks=2))['items'][0]['total'], 4)
+
+        # Live database moves on; the snapshot (and its generation) doesn't yet
+        self.add_issue(self.teachers[0], 6, 2)
+        bump_generation('items')
+        db.session.commit()
+        self.assertEqual(get_consumption_analytics(START, START + timedelta(weeks=2))['items'][0]['total'], 4)
+        reporting_db.refresh_snapshot()
+        self.assertEqual(get_consumption_analytics(START, START + timedelta(weeks=2))['items'][0]['total'], 10)
+
+    def test_seasonality_by_term(self):
+        arrays = {
+            'day': np.array([0, 7 * 20, 7 * 40]),  # spring, summer, autumn
+            'teacher_id': np.array([1, 1, 1]),
+            'item_id': np.array([5, 5, 5]),
+            'qty': np.array([30, 10, 20])
+        }
+        result = compute_analytics(arrays, START, START + timedelta(weeks=52))
+        spring, summer = result['seasonality'][0, 1], result['seasonality'][0, 2]
+        self.assertGreater(spring, summer)
+
+    def test_helpers(self):
+        matrix = np.array([[1.0, 2.0, 3.0, 4.0, 5.0]])
+        np.testing.assert_allclose(rolling_mean(matrix, 2), [[1.0, 1.5, 2.5, 3.5, 4.5]])
+        medians, counts = group_median(np.array([0, 0, 1, 0, 1]), np.array([5.0, 1.0, 4.0, 3.0, 2.0]), 3)
+        np.testing.assert_allclose(medians, [3.0, 3.0, 0.0])
+        self.assertEqual(counts.tolist(), [3, 2, 0])
+
+    def test_route(self):
+        self.add_issue(self.teachers[0], 4, 1)
+        db.session.commit()
+        response = self.app.get('/reports/analytics?start=2024-01-01&end=2024-01-15')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['items'][0]['weekly'], [4, 0])
+        self.assertEqual(self.app.get('/reports/analytics?start=2024-02-01&end=2024-01-01').status_code, 400)
+        self.assertEqual(self.app.get('/reports/analytics?start=2024-13-01').status_code, 400)
+        self.assertEqual(self.app.get('/reports/analytics?start=2018-01-01&end=2024-01-01').status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
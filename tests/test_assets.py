@@ -0,0 +1,76 @@
+import os
+import gzip
+import shutil
+import tempfile
+import unittest
+from app import db
+from tests import create_test_app, remove_test_app
+from services import assets
+
+class TestAssets(unittest.TestCase):
+    def setUp(self):
+        self.flask_app = create_test_app()
+        self.client = self.flask_app.test_client()
+        self.ctx = self.flask_app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.original_static = self.flask_app.static_folder
+        self.tmp = tempfile.mkdtemp()
+        static_dir = os.path.join(self.tmp, 'static')
+        shutil.copytree(self.original_static, static_dir, ignore=shutil.ignore_patterns('dist'))
+        self.flask_app.static_folder = static_dir
+        assets._manifest_cache.clear()
+        self.manifest = assets.build_assets(static_dir)
+
+    def tearDown(self):
+        self.flask_app.static_folder = self.original_static
+        assets._manifest_cache.clear()
+        shutil.rmtree(self.tmp)
+        db.session.remove()
+        self.ctx.pop()
+        remove_test_app(self.flask_app)
+
+    def test_pages_reference_fingerprinted_assets(self):
+        response = self.client.get('/checkout')
+        self.assertIn(f"/assets/{self.manifest['app.css']}".encode(), response.data)
+
+    def test_precompressed_variant_is_served(self):
+        url = f"/assets/{self.manifest['app.js']}"
+        response = self.client.get(url, headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('javascript', response.headers['Content-Type'])
+        self.assertIn('immutable', response.headers['Cache-Control'])
+        with open(os.path.join(self.flask_app.static_folder, 'app.js'), 'rb') as f:
+            self.assertEqual(gzip.decompress(response.data), f.read())
+
+        response = self.client.get(url, headers={'Accept-Encoding': 'identity'})
+        self.assertNotIn('Content-Encoding', response.headers)
+
+    def test_previous_build_is_kept_then_pruned(self):
+        static_dir = self.flask_app.static_folder
+        dist_dir = os.path.join(static_dir, assets.DIST_DIR)
+        builds = [self.manifest]
+        for n in range(2):
+            with open(os.path.join(static_dir, 'app.js'), 'a') as f:
+                f.write(f"\n// build {n}\n")
+            builds.append(assets.build_assets(static_dir))
+
+        first, previous, current = (b['app.js'] for b in builds)
+        self.assertEqual(len({first, previous, current}), 3)
+        # Workers that haven't reloaded yet still find the previous build
+        self.assertTrue(os.path.exists(os.path.join(dist_dir, previous)))
+        self.assertTrue(os.path.exists(os.path.join(dist_dir, previous + '.gz')))
+        self.assertFalse(os.path.exists(os.path.join(dist_dir, first)))
+        self.assertFalse(os.path.exists(os.path.join(dist_dir, first + '.gz')))
+        # Unchanged assets keep their file
+        self.assertTrue(os.path.exists(os.path.join(dist_dir, builds[0]['app.css'])))
+
+    def test_service_worker_precaches_checkout_shell(self):
+        response = self.client.get('/sw.js')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'/checkout', response.data)
+        self.assertIn(self.manifest['signature.js'].encode(), response.data)
+        self.assertEqual(response.headers['Cache-Control'], 'no-cache')
+        # The shell holds server-rendered lists: network first, cache only when offline
+        self.assertIn(b'networkFirst(event, SHELL_URL)', response.data)
@@ -1,14 +1,13 @@
 import unittest
-from app import app, db, User, Item, Teacher, Department
+from app import db, User, Item, Teacher, Department
+from tests import create_test_app, remove_test_app
 from config import Config
 
 class TestBasic(unittest.TestCase):
     def setUp(self):
-        app.config['TESTING'] = True
-        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
-        app.config['WTF_CSRF_ENABLED'] = False
-        self.app = app.test_client()
-        self.ctx = app.app_context()
+        self.flask_app = create_test_app(WTF_CSRF_ENABLED=False)
+        self.app = self.flask_app.test_client()
+        self.ctx = self.flask_app.app_context()
         self.ctx.push()
         db.create_all()
         
@@ -21,8 +20,8 @@ class TestBasic(unittest.TestCase):
 
     def tearDown(self):
         db.session.remove()
-        db.drop_all()
         self.ctx.pop()
+        remove_test_app(self.flask_app)
 
     def test_dashboard_load(self):
         response = self.app.get('/')
@@ -51,3 +50,8 @@ class TestBasic(unittest.TestCase):
     def test_checkout_page_load(self):
         response = self.app.get('/checkout')
         self.assertEqual(response.status_code, 200)
+
+    def test_bottom_nav_marks_current_page(self):
+        response = self.app.get('/inventory')
+        self.assertEqual(response.data.count(b'nav-item-link active'), 1)
+        self.assertRegex(response.data.decode(), r'href="/inventory"\s+class="nav-item-link active"')
@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+from app import db, User, Teacher, Department
+from tests import create_test_app, remove_test_app
+from services.cache import response_cache, bump_generation, SQLiteStore
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.flask_app = create_test_app()
+        self.app = self.flask_app.test_client()
+        self.ctx = self.flask_app.app_context()
+        self.ctx.push()
+        db.create_all()
+        response_cache.clear()
+
+        self.dept = Department(name="Science")
+        db.session.add_all([User(name="Admin", role="admin"), self.dept])
+        db.session.commit()
+        db.session.add(Teacher(name="Ms. Frizzle", department_id=self.dept.id))
+        bump_generation('teachers', 'departments')
+        db.session.commit()
+
+    def tearDown(self):
+        response_cache.clear()
+        db.session.remove()
+        self.ctx.pop()
+        remove_test_app(self.flask_app)
+
+    def endpoint_stats(self):
+        return response_cache.stats().get('store.hx_teacher_search', {'hits': 0, 'misses': 0, 'not_modified': 0})
+
+    def test_hit_and_invalidation(self):
+        before = self.endpoint_stats()
+        first = self.app.get('/hx/teachers/search?q=Fr')
+        second = self.app.get('/hx/teachers/search?q=Fr')
+        self.assertEqual(first.data, second.data)
+        after = self.endpoint_stats()
+        self.assertEqual(after['misses'] - before['misses'], 1)
+        self.assertEqual(after['hits'] - before['hits'], 1)
+
+        # Adding a teacher through the write path bumps the generation
+        self.app.post('/teachers', data={'name': 'Mr. Frank', 'department_id': self.dept.id})
+        third = self.app.get('/hx/teachers/search?q=Fr')
+        self.assertIn(b'Mr. Frank', third.data)
+
+    def test_etag_not_modified(self):
+        first = self.app.get('/departments')
+        etag = first.headers['ETag']
+        second = self.app.get('/departments', headers={'If-None-Match': etag})
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.data, b'')
+
+    def test_sqlite_store_roundtrip(self):
+        fd, path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        try:
+            store = SQLiteStore(path)
+            entry = {'generations': [3, 7], 'etag': 'abc', 'content_type': 'text/html', 'body': b'<li>x</li>'}
+            store.set('key', entry)
+            self.assertEqual(store.get('key'), entry)
+            store.clear()
+            self.assertIsNone(store.get('key'))
+        finally:
+            os.remove(path)
@@ -1,13 +1,13 @@
 import unittest
 from flask import session
-from app import app, db, User, Item, Teacher, Department, InventoryLog
+from app import db, User, Item, Teacher, Department, InventoryLog
+from tests import create_test_app, remove_test_app
 
 class TestFlow(unittest.TestCase):
     def setUp(self):
-        app.config['TESTING'] = True
-        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
-        self.app = app.test_client()
-        self.ctx = app.app_context()
+        self.flask_app = create_test_app()
+        self.app = self.flask_app.test_client()
+        self.ctx = self.flask_app.app_context()
         self.ctx.push()
         db.create_all()
         
@@ -24,8 +24,8 @@ class TestFlow(unittest.TestCase):
 
     def tearDown(self):
         db.session.remove()
-        db.drop_all()
         self.ctx.pop()
+        remove_test_app(self.flask_app)
 
     def test_cart_add_htmx(self):
         with self.app as c:
@@ -0,0 +1,70 @@
+import unittest
+from werkzeug.datastructures import MultiDict
+from app import db, User, Item, Teacher, Department
+from tests import create_test_app, remove_test_app
+from services.inventory import adjust_stock
+from services.issues import process_issue
+from services.history import get_item_history, parse_cursor
+
+SIG = "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
+
+class TestHistory(unittest.TestCase):
+    def setUp(self):
+        self.flask_app = create_test_app()
+        self.app = self.flask_app.test_client()
+        self.ctx = self.flask_app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.user = User(name="Admin", role="admin")
+        self.dept = Department(name="Science")
+        db.session.add_all([self.user, self.dept])
+        db.session.commit()
+
+        self.teacher = Teacher(name="Mr. Test", department_id=self.dept.id)
+        self.item = Item(name="Pen", sku="PEN-01", stock_on_hand=0)
+        db.session.add_all([self.teacher, self.item])
+        db.session.commit()
+
+        # Balances after each event: 50, 40, 70, 65, 60
+        adjust_stock(self.item.id, 50, "ADJUST", note="Initial Stock", user_id=self.user.id)
+        db.session.commit()
+        process_issue(self.user.id, self.teacher.id, {str(self.item.id): 10}, SIG, self.flask_app.instance_path)
+        adjust_stock(self.item.id, 30, "RESTOCK", user_id=self.user.id)
+        db.session.commit()
+        for _ in range(2):
+            adjust_stock(self.item.id, -5, "ADJUST")
+            db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        self.ctx.pop()
+        remove_test_app(self.flask_app)
+
+    def test_keyset_pages_carry_running_balance(self):
+        balances, events = [], []
+        before, balance = None, None
+        while True:
+            history, cursor = get_item_history(self.item, before=before, balance=balance, limit=2)
+            balances += [h['balance_after'] for h in history]
+            events += history
+            if cursor is None:
+                break
+            before, balance = parse_cursor(MultiDict(cursor))
+
+        self.assertEqual(balances, [60, 65, 70, 40, 50])
+        issue = events[3]
+        self.assertEqual(issue['teacher_name'], "Mr. Test")
+        self.assertEqual(issue['user_name'], "Admin")
+
+    def test_history_endpoint(self):
+        response = self.app.get(f'/hx/items/{self.item.id}/history')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Mr. Test', response.data)
+        response = self.app.get(f'/hx/items/{self.item.id}/history?before_created=bad&before_id=1&balance=5')
+        self.assertEqual(response.status_code, 400)
+        # A cursor without its balance would restart the running totals from current stock
+        for query in ['before_created=2024-01-01T00:00:00&before_id=1',
+                      'before_created=2024-01-01T00:00:00&before_id=1&balance=x']:
+            response = self.app.get(f'/hx/items/{self.item.id}/history?{query}')
+            self.assertEqual(response.status_code, 400)
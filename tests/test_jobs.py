@@ -0,0 +1,154 @@
+import json
+import time
+import unittest
+from unittest import mock
+from datetime import datetime, timedelta
+from app import db, User, Item
+from tests import create_test_app, remove_test_app
+from models import Job
+from services.jobs import job_runner
+
+def echo_job(ctx, lines=()):
+    for n, line in enumerate(lines, start=1):
+        ctx.log(line)
+        ctx.progress(n * 100 / len(lines), f"{n}/{len(lines)}")
+
+def failing_job(ctx):
+    raise RuntimeError("boom")
+
+# Status of each completing_job as seen by the handler right after ctx.complete()
+completed_status = []
+
+def completing_job(ctx):
+    ctx.complete("Done early")
+    completed_status.append(job_runner.get(ctx.job_id).status)
+
+class TestJobs(unittest.TestCase):
+    def setUp(self):
+        self.flask_app = create_test_app()
+        self.app = self.flask_app.test_client()
+        self.ctx = self.flask_app.app_context()
+        self.ctx.push()
+        db.create_all()
+        job_runner.register('echo', 'tests.test_jobs.echo_job', concurrency=1)
+        job_runner.register('fail', 'tests.test_jobs.failing_job', concurrency=1)
+        job_runner.register('once', 'tests.test_jobs.echo_job', concurrency=1, resumable=False)
+
+    def tearDown(self):
+        db.session.remove()
+        self.ctx.pop()
+        remove_test_app(self.flask_app)
+
+    def queue(self, job_type, **params):
+        # Insert without waking the dispatcher so the test drives execution
+        job = Job(job_type=job_type, params=json.dumps(params))
+        db.session.add(job)
+        db.session.commit()
+        return job.id
+
+    def test_run_pending_records_output_and_status(self):
+        ok = self.queue('echo', lines=['first', 'second'])
+        bad = self.queue('fail')
+        self.assertEqual(job_runner.run_pending(), 2)
+        db.session.expire_all()
+
+        job = db.session.get(Job, ok)
+        self.assertEqual(job.status, 'succeeded')
+        self.assertEqual(job.progress, 100)
+        self.assertEqual(job.output, 'first\nsecond\n')
+        self.assertEqual(job_runner.read_output(ok, offset=6), 'second\n')
+
+        job = db.session.get(Job, bad)
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('boom', job.error)
+
+    def test_concurrency_limit_per_type(self):
+        first = self.queue('echo')
+        self.queue('echo')
+        self.assertEqual(job_runner.claim_next(), first)
+        # Second echo job must wait for the first (limit 1)
+        self.assertIsNone(job_runner.claim_next())
+
+    def test_resume_requeues_interrupted_jobs(self):
+        job_id = self.queue('echo', lines=['again'])
+        job_runner.claim_next()
+        job = db.session.get(Job, job_id)
+        job.heartbeat_at = datetime.utcnow() - timedelta(minutes=10)
+        db.session.commit()
+
+        self.assertEqual(job_runner.resume(), 1)
+        db.session.expire_all()
+        self.assertEqual(db.session.get(Job, job_id).status, 'queued')
+        self._wait_for(job_id)
+
+    def test_resume_fails_non_resumable_jobs(self):
+        job_id = self.queue('once', lines=['deploying'])
+        job_runner.claim_next()
+        job = db.session.get(Job, job_id)
+        job.heartbeat_at = datetime.utcnow() - timedelta(minutes=10)
+        db.session.commit()
+
+        self.assertEqual(job_runner.resume(), 0)
+        db.session.expire_all()
+        job = db.session.get(Job, job_id)
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('not resumed', job.error)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_complete_records_success_before_handler_returns(self):
+        job_runner.register('complete', 'tests.test_jobs.completing_job', concurrency=1)
+        job_id = self.queue('complete')
+        job_runner.run_job(job_runner.claim_next())
+        # Already finished while the handler was still running
+        self.assertEqual(completed_status[-1], 'succeeded')
+        db.session.expire_all()
+        job = db.session.get(Job, job_id)
+        self.assertEqual((job.status, job.message), ('succeeded', "Done early"))
+
+    def test_dispatcher_reclaims_jobs_of_a_recycled_worker(self):
+        # A worker died mid-job moments ago: too recent for the startup check
+        zombie = Job(job_type='echo', params=json.dumps({'lines': ['again']}), status='running',
+                     owner='recycled-worker', attempts=1, heartbeat_at=datetime.utcnow() - timedelta(seconds=5))
+        db.session.add(zombie)
+        db.session.commit()
+        self.assertEqual(job_runner.resume(), 0)
+        waiting = self.queue('echo', lines=['next'])
+        self.assertIsNone(job_runner.claim_next())
+
+        # The running dispatcher reclaims it once it goes stale, freeing the slot
+        with mock.patch('services.jobs.STALE_SECONDS', 1):
+            job_runner.start()
+            self.assertEqual(self._wait_for(waiting).output, 'next\n')
+            self.assertEqual(self._wait_for(zombie.id).output, 'again\n')
+
+    def test_submit_runs_in_background(self):
+        job = job_runner.submit('echo', lines=['hello'])
+        self._wait_for(job.id)
+
+        data = self.app.get(f'/jobs/{job.id}').get_json()
+        self.assertEqual(data['status'], 'succeeded')
+        self.assertEqual(self.app.get(f'/jobs/{job.id}/output').data, b'hello\n')
+        response = self.app.get(f'/hx/jobs/{job.id}')
+        self.assertEqual(response.headers['HX-Trigger'], 'jobFinished')
+
+    def test_reset_db_job_keeps_queue(self):
+        db.session.add(User(name="Admin", role="admin"))
+        db.session.commit()
+        response = self.app.get('/admin/reset-db')
+        self.assertEqual(response.status_code, 200)
+        job_id = Job.query.order_by(Job.id.desc()).first().id
+        self._wait_for(job_id)
+        self.assertEqual(Item.query.count(), 3)
+        self.assertIsNotNone(User.query.first())
+
+    def _wait_for(self, job_id, timeout=10):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            db.session.expire_all()
+            job = db.session.get(Job, job_id)
+            if job.finished:
+                self.assertEqual(job.status, 'succeeded', job.error)
+                return job
+            db.session.rollback()
+            time.sleep(0.05)
+        self.fail(f"Job {job_id} did not finish")
@@ -0,0 +1,103 @@
+import unittest
+from sqlalchemy import text
+from app import db, User, Item, Teacher, Department
+from tests import create_test_app, remove_test_app
+from models import ReorderAlert
+from services.inventory import adjust_stock
+from services.reorder import get_alert_feed, get_low_stock_ids, get_reorder_report
+from services.startup import ensure_schema
+
+class TestReorder(unittest.TestCase):
+    def setUp(self):
+        self.flask_app = create_test_app()
+        self.app = self.flask_app.test_client()
+        self.ctx = self.flask_app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.user = User(name="Admin", role="admin")
+        self.item = Item(name="Pen", sku="PEN-01", stock_on_hand=20, reorder_level=5)
+        db.session.add_all([self.user, self.item])
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        self.ctx.pop()
+        remove_test_app(self.flask_app)
+
+    def test_alerts_backfilled_when_table_is_created(self):
+        # A database from before reorder alerts: low items were never recorded
+        low = Item(name="Stapler", sku="STP-01", stock_on_hand=2, reorder_level=5)
+        db.session.add(low)
+        db.session.commit()
+        low_id = low.id
+        db.session.remove()
+        ReorderAlert.__table__.drop(db.engine)
+        with db.engine.begin() as conn:
+            conn.execute(text("PRAGMA user_version = 0"))
+
+        self.assertTrue(ensure_schema())
+        self.assertEqual(get_low_stock_ids(), {low_id})
+        # Only on creation: the next run doesn't open duplicates
+        with db.engine.begin() as conn:
+            conn.execute(text("PRAGMA user_version = 0"))
+        ensure_schema()
+        self.assertEqual(ReorderAlert.query.count(), 1)
+
+    def test_crossing_opens_and_clears_alert(self):
+        adjust_stock(self.item.id, -10, "ISSUE")
+        db.session.commit()
+        self.assertEqual(get_low_stock_ids(), set())
+
+        adjust_stock(self.item.id, -6, "ISSUE")
+        db.session.commit()
+        self.assertEqual(get_low_stock_ids(), {self.item.id})
+
+        # Still low: same alert is updated, not duplicated
+        adjust_stock(self.item.id, -1, "ISSUE")
+        db.session.commit()
+        self.assertEqual(ReorderAlert.query.count(), 1)
+        self.assertEqual(ReorderAlert.query.first().stock_on_hand, 3)
+
+        adjust_stock(self.item.id, 20, "RESTOCK")
+        db.session.commit()
+        self.assertEqual(get_low_stock_ids(), set())
+        self.assertIsNotNone(ReorderAlert.query.first().cleared_at)
+
+    def test_alert_feed_orders_by_latest_event(self):
+        stapler = Item(name="Stapler", sku="STP-01", stock_on_hand=20, reorder_level=5)
+        db.session.add(stapler)
+        db.session.commit()
+        adjust_stock(self.item.id, -18, "ISSUE")
+        db.session.commit()
+        adjust_stock(stapler.id, -18, "ISSUE")
+        db.session.commit()
+        self.assertEqual([a.item.name for a in get_alert_feed()], ["Stapler", "Pen"])
+
+        # Clearing the older alert is the newest event
+        adjust_stock(self.item.id, 20, "RESTOCK")
+        db.session.commit()
+        self.assertEqual([a.item.name for a in get_alert_feed()], ["Pen", "Stapler"])
+
+    def test_report_forecasts_days_of_cover(self):
+        adjust_stock(self.item.id, -17, "ISSUE")
+        db.session.commit()
+
+        report = get_reorder_report()
+        self.assertEqual(len(report), 1)
+        row = report[0]
+        self.assertEqual(row['stock_on_hand'], 3)
+        # 17 issued over a 30 day window
+        self.assertAlmostEqual(row['daily_rate'], 17 / 30)
+        self.assertAlmostEqual(row['days_of_cover'], 3 / (17 / 30))
+        self.assertGreater(row['suggested_qty'], 0)
+
+    def test_reorder_pages_load(self):
+        adjust_stock(self.item.id, -18, "ISSUE")
+        db.session.commit()
+        response = self.app.get('/reorder')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Pen', response.data)
+        response = self.app.get('/hx/reorder/alerts')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Low', response.data)
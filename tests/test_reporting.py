@@ -0,0 +1,97 @@
+import os
+import time
+import unittest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from app import db, User, Item, Teacher, Department
+from tests import create_test_app, remove_test_app
+from models import Issue, IssueLine
+from services.reporting import reporting_db, checkpoint_scheduler
+from services.reports import get_stats
+
+class TestReporting(unittest.TestCase):
+    def setUp(self):
+        self.flask_app = create_test_app()
+        self.app = self.flask_app.test_client()
+        self.ctx = self.flask_app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.mode = reporting_db.mode
+        self.snapshot_seconds = reporting_db.snapshot_seconds
+
+        user = User(name="Admin", role="admin")
+        dept = Department(name="Science")
+        db.session.add_all([user, dept])
+        db.session.commit()
+        self.teacher = Teacher(name="Mr. Test", department_id=dept.id)
+        self.item = Item(name="Pen", sku="PEN-01", stock_on_hand=100)
+        db.session.add_all([self.teacher, self.item])
+        db.session.commit()
+        self.user = user
+
+    def tearDown(self):
+        reporting_db.mode = self.mode
+        reporting_db.snapshot_seconds = self.snapshot_seconds
+        db.session.remove()
+        self.ctx.pop()
+        remove_test_app(self.flask_app)
+
+    def add_issue(self, qty):
+        issue = Issue(teacher_id=self.teacher.id, user_id=self.user.id, signature_path="signatures/x.png")
+        db.session.add(issue)
+        db.session.flush()
+        db.session.add(IssueLine(issue_id=issue.id, item_id=self.item.id, qty=qty))
+        db.session.commit()
+
+    def test_snapshot_is_refreshed_not_live(self):
+        reporting_db.mode = 'snapshot'
+        self.add_issue(4)
+        reporting_db.refresh_snapshot()
+        self.assertEqual(get_stats(), {'total_issues': 1, 'total_items_issued': 4})
+
+        # New checkout writes are invisible until the next refresh
+        self.add_issue(6)
+        self.assertEqual(get_stats()['total_issues'], 1)
+        reporting_db.refresh_snapshot()
+        self.assertEqual(get_stats(), {'total_issues': 2, 'total_items_issued': 10})
+
+    def test_stale_snapshot_reads_live_and_refreshes_in_background(self):
+        reporting_db.mode = 'snapshot'
+        reporting_db.snapshot_seconds = 0.2
+        self.add_issue(4)
+        reporting_db.refresh_snapshot()
+        self.add_issue(6)
+        time.sleep(0.5)
+
+        # Too old to serve: the request reads the live file instead of taking a snapshot itself
+        self.assertEqual(get_stats()['total_issues'], 2)
+        deadline = time.time() + 5
+        while reporting_db.metrics()['snapshot_age_seconds'] > 0.3 and time.time() < deadline:
+            time.sleep(0.02)
+        self.assertLess(reporting_db.metrics()['snapshot_age_seconds'], 0.5)
+        with reporting_db.session() as s:
+            self.assertEqual(s.execute(text("SELECT COUNT(*) FROM issue")).scalar(), 2)
+
+    def test_refresh_leaves_no_temp_files(self):
+        reporting_db.mode = 'snapshot'
+        reporting_db.refresh_snapshot()
+        reporting_db.refresh_snapshot()
+        folder = os.path.dirname(reporting_db.snapshot_path)
+        self.assertEqual([f for f in os.listdir(folder) if f.endswith('.tmp')], [])
+
+    def test_readonly_connection_sees_live_data_and_rejects_writes(self):
+        reporting_db.mode = 'readonly'
+        self.add_issue(3)
+        self.assertEqual(get_stats()['total_items_issued'], 3)
+        with reporting_db.session() as s:
+            with self.assertRaises(OperationalError):
+                s.execute(text("DELETE FROM issue_line"))
+
+    def test_checkpoint_metrics(self):
+        self.add_issue(1)
+        result = checkpoint_scheduler.checkpoint()
+        self.assertIn(result['mode'], ('PASSIVE', 'TRUNCATE'))
+        data = self.app.get('/admin/db-metrics').get_json()
+        self.assertGreaterEqual(data['wal']['checkpoints'], 1)
+        self.assertIsNotNone(data['wal']['last_duration_ms'])
+        self.assertIn('wal_bytes', data['wal'])
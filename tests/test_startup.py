@@ -0,0 +1,67 @@
+import os
+import sys
+import subprocess
+import unittest
+from app import db, socketio
+from tests import create_test_app, remove_test_app
+from models import Item
+from services.startup import ensure_schema
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative `import app` time (Flask + SQLAlchemy dominate, ~0.5s locally)
+IMPORT_BUDGET_MS = int(os.environ.get('IMPORT_BUDGET_MS', 1500))
+
+# Only loaded on first use
+LAZY_MODULES = ['barcode', 'PIL', 'flask_socketio', 'socketio', 'engineio', 'api_deploy', 'brotli', 'numpy']
+
+def import_times():
+    """{module: cumulative microseconds} from `python -X importtime -c 'import app'`"""
+    env = dict(os.environ, FLASK_TESTING='1')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+class TestStartup(unittest.TestCase):
+    def setUp(self):
+        self.flask_app = create_test_app()
+        self.app = self.flask_app.test_client()
+        self.ctx = self.flask_app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        self.ctx.pop()
+        remove_test_app(self.flask_app)
+
+    def test_import_budget(self):
+        times = import_times()
+        for module in LAZY_MODULES:
+            self.assertNotIn(module, times, f"{module} imported at startup")
+        self.assertLess(times['app'] / 1000, IMPORT_BUDGET_MS)
+
+    def test_ensure_schema_skips_when_unchanged(self):
+        ensure_schema()
+        self.assertFalse(ensure_schema())
+        # drop_all clears the fingerprint so the tables come back
+        db.drop_all()
+        self.assertTrue(ensure_schema())
+        self.assertEqual(Item.query.count(), 0)
+
+    def test_lazy_deploy_webhook(self):
+        response = self.app.post('/api/deploy_trigger', headers={'X-Deploy-Secret': 'wrong'})
+        self.assertEqual(response.status_code, 403)
+
+    def test_lazy_socketio(self):
+        response = self.app.get('/socket.io/?EIO=4&transport=polling')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(socketio.loaded)
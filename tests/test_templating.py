@@ -0,0 +1,34 @@
+import unittest
+from flask import render_template
+from app import db, Item
+from tests import create_test_app, remove_test_app
+from services.templating import render_fragment, precompile_templates
+
+class TestTemplating(unittest.TestCase):
+    def setUp(self):
+        self.flask_app = create_test_app()
+        self.ctx = self.flask_app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        self.ctx.pop()
+        remove_test_app(self.flask_app)
+
+    def test_precompile_loads_every_template(self):
+        self.assertEqual(precompile_templates(self.flask_app), len(self.flask_app.jinja_env.list_templates()))
+        self.assertIsNotNone(self.flask_app.jinja_env.bytecode_cache)
+
+    def test_templates_reload_only_in_debug(self):
+        self.assertFalse(self.flask_app.jinja_env.auto_reload)
+        self.flask_app.debug = True
+        self.assertTrue(self.flask_app.jinja_env.auto_reload)
+
+    def test_fragment_matches_render_template(self):
+        items = [Item(id=1, name="Pen", sku="PEN-01", stock_on_hand=2, reorder_level=5)]
+        items[0].qty = 3
+        with self.flask_app.test_request_context('/hx/items/search?q=pen'):
+            for template, context in [('hx/item_search.html', {'items': items}),
+                                      ('hx/cart.html', {'cart_items': items})]:
+                self.assertEqual(render_fragment(template, **context), render_template(template, **context))
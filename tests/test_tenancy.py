@@ -0,0 +1,145 @@
+import os
+import re
+import time
+import unittest
+from types import SimpleNamespace
+from app import db, Department, Item, Teacher, User
+from tests import create_test_app, remove_test_app
+from models import Job
+from services.jobs import job_runner
+from services.tenancy import TenantEngines, tenant_context, tenant_engines, tenant_instance_path
+
+SIGNATURE = ("data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk"
+             "+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg==")
+
+class TestTenancy(unittest.TestCase):
+    def setUp(self):
+        self.tenant_app = create_test_app(TENANCY_ENABLED=True, TENANTS=['north', 'south'],
+                                          TENANT_HOST_SUFFIX='schools.test')
+        self.tmp = self.tenant_app.instance_path
+        self.client = self.tenant_app.test_client()
+        self.ctx = self.tenant_app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        for tenant, name in [('north', 'North Pen'), ('south', 'South Ruler')]:
+            with tenant_context(tenant):
+                db.session.add_all([User(name="Admin", role="admin"),
+                                    Item(name=name, sku=f"SKU-{tenant}", stock_on_hand=5)])
+                db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        self.ctx.pop()
+        remove_test_app(self.tenant_app)
+
+    def test_each_school_has_its_own_database(self):
+        self.assertTrue(os.path.exists(os.path.join(self.tmp, 'tenants', 'north', 'store.db')))
+        with tenant_context('north'):
+            self.assertEqual([i.name for i in Item.query.all()], ['North Pen'])
+            self.assertEqual(tenant_instance_path(), os.path.join(self.tmp, 'tenants', 'north'))
+        with tenant_context('south'):
+            self.assertEqual([i.name for i in Item.query.all()], ['South Ruler'])
+        # The default database is untouched
+        self.assertEqual(Item.query.count(), 0)
+
+    def test_request_resolved_from_host(self):
+        resp = self.client.get('/inventory', headers={'Host': 'north.schools.test'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn(b'North Pen', resp.data)
+        self.assertNotIn(b'South Ruler', resp.data)
+
+    def test_request_resolved_from_path_prefix(self):
+        resp = self.client.get('/t/south/inventory')
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn(b'South Ruler', resp.data)
+        self.assertNotIn(b'North Pen', resp.data)
+
+    def test_session_is_per_school_with_path_prefix(self):
+        with tenant_context('north'):
+            item_id = Item.query.first().id
+        self.client.post('/t/north/hx/cart/add', data={'item_id': item_id, 'qty': 2})
+        self.assertEqual(self.client.get_cookie('session_north', path='/t/north').path, '/t/north')
+        self.assertIsNone(self.client.get_cookie('session'))
+        self.assertEqual(self.client.get('/t/south/hx/cart/count').data, b'0')
+        self.assertEqual(self.client.get('/t/north/hx/cart/count').data, b'2')
+
+    def test_checkout_flow_stays_in_school_with_path_prefix(self):
+        with tenant_context('north'):
+            dept = Department(name="Maths")
+            db.session.add(dept)
+            db.session.flush()
+            db.session.add(Teacher(name="Ms. North", department_id=dept.id))
+            db.session.commit()
+            teacher_id = Teacher.query.first().id
+
+        page = self.client.get('/t/north/checkout').data.decode()
+        self.assertIn('hx-get="/t/north/hx/cart/view"', page)
+
+        # Follow the URLs the fragments hand out, as htmx would
+        results = self.client.get('/t/north/hx/items/search?q=North').data.decode()
+        add_url = re.search(r'hx-post="([^"]+)"', results).group(1)
+        self.assertEqual(add_url, '/t/north/hx/cart/add')
+        self.client.post(add_url, data={'item_id': 1, 'qty': 2})
+        cart = self.client.get('/t/north/hx/cart/view').data.decode()
+        self.assertIn('hx-post="/t/north/hx/cart/update"', cart)
+
+        resp = self.client.post('/t/north/checkout/complete', data={
+            'teacher_id': teacher_id, 'signature_data': SIGNATURE
+        }, follow_redirects=True)
+        self.assertEqual(resp.request.path, '/t/north/')
+        self.assertIn(b'Transaction Completed Successfully', resp.data)
+        self.assertIn(b'window.location.href = "/t/north/checkout"', resp.data)
+        with tenant_context('north'):
+            self.assertEqual(Item.query.first().stock_on_hand, 3)
+        with tenant_context('south'):
+            self.assertEqual(Item.query.first().stock_on_hand, 5)
+        self.assertTrue(os.listdir(os.path.join(self.tmp, 'tenants', 'north', 'signatures')))
+
+    def test_unknown_school_is_404(self):
+        resp = self.client.get('/inventory', headers={'Host': 'east.schools.test'})
+        self.assertEqual(resp.status_code, 404)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp, 'tenants', 'east')))
+
+    def test_jobs_run_against_their_school(self):
+        resp = self.client.get('/admin/reset-db', headers={'Host': 'north.schools.test'})
+        self.assertEqual(resp.status_code, 200)
+        job = Job.query.order_by(Job.id.desc()).first()
+        self.assertEqual(job.tenant, 'north')
+        self._wait_for(job.id)
+
+        with tenant_context('north'):
+            self.assertEqual(Item.query.count(), 3)
+        with tenant_context('south'):
+            self.assertEqual([i.name for i in Item.query.all()], ['South Ruler'])
+        self.assertEqual(Item.query.count(), 0)
+        # Other schools can't see the job
+        resp = self.client.get(f'/jobs/{job.id}', headers={'Host': 'south.schools.test'})
+        self.assertEqual(resp.status_code, 404)
+
+    def _wait_for(self, job_id, timeout=10):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            job = job_runner.get(job_id)
+            if job.finished:
+                self.assertEqual(job.status, 'succeeded', job.error)
+                return job
+            time.sleep(0.05)
+        self.fail(f"Job {job_id} did not finish")
+
+    def test_engine_pool_evicts_least_recently_used(self):
+        engines = TenantEngines()
+        engines.app = SimpleNamespace(instance_path=self.tmp)
+        engines.max_engines = 2
+        first = engines.get('a')
+        engines.get('b')
+        self.assertIs(engines.get('a'), first)
+        engines.get('c')
+        self.assertEqual([t for t, _ in engines.open_engines()], ['a', 'c'])
+        self.assertEqual(engines.metrics()['evicted'], 1)
+        with self.assertRaises(ValueError):
+            engines.get('../etc')
+        engines.dispose_all()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,428 @@
+import os
+import time
+from datetime import date, datetime
+from flask import Blueprint, current_app, render_template, request, session, redirect, url_for, flash, make_response, send_file, jsonify, Response, stream_with_context
+from sqlalchemy import or_
+
+from models import db, User, Teacher, Item, Issue, InventoryLog, Department
+
+# Services
+# Keep these imports light: barcode rendering (python-barcode/Pillow), Flask-SocketIO
+# and the deploy webhook are loaded on first use (see services.lazy).
+from services.inventory import adjust_stock
+from services.issues import process_issue
+from services.reports import get_stats
+from services.reorder import check_reorder, get_reorder_report, get_alert_feed
+from services.history import get_item_history, parse_cursor
+from services.assets import asset_url, send_asset, manifest_version
+from services.cache import response_cache, bump_generation
+from services.templating import render_fragment
+from services.barcodes import get_barcode_path, generate_barcode_value, is_valid_barcode_value, barcode_image_exists
+from services.allocator import allocate
+from services.jobs import job_runner
+from services.reporting import reporting_db, checkpoint_scheduler
+from services.pairing import create_pairing_code, active_pairings
+from services.tenancy import tenant_engines, tenant_instance_path
+
+# All pages, HTMX fragments and JSON endpoints; registered by app.create_app()
+bp = Blueprint('store', __name__)
+
+# TEMPORARY FIX ROUTE for Remote Deployment
+@bp.route('/admin/reset-db')
+def admin_reset_db():
+    # Runs in the background job pool (services.maintenance.reset_database)
+    # The job drops the user table while this page renders: put the user in the session first
+    inject_user()
+    job = job_runner.submit('reset_db')
+    return render_template('job.html', job=job, title="Reset Database")
+
+@bp.route('/admin/cache-stats')
+def admin_cache_stats():
+    return jsonify(response_cache.stats())
+
+@bp.route('/admin/db-metrics')
+def admin_db_metrics():
+    return jsonify({
+        'reporting': reporting_db.metrics(),
+        'wal': checkpoint_scheduler.metrics(),
+        'tenants': tenant_engines.metrics()
+    })
+
+# --- Context ---
+@bp.app_context_processor
+def inject_user():
+    # MVP Mock User
+    if 'user_id' not in session:
+        u = User.query.first()
+        if u: session['user_id'] = u.id
+    return dict()
+
+# --- Routes ---
+
+@bp.route('/')
+def dashboard():
+    stats = get_stats()
+    return render_template('dashboard.html', stats=stats)
+
+@bp.route('/checkout')
+def checkout():
+    # Mobile App View
+    items = Item.query.filter_by(active=True).all()
+    teachers = Teacher.query.filter_by(active=True).all()
+    return render_template('checkout.html', items=items, teachers=teachers)
+
+@bp.route('/checkout/complete', methods=['POST'])
+def checkout_complete():
+    cart = session.get('cart', {})
+    teacher_id = request.form.get('teacher_id')
+    sig_data = request.form.get('signature_data')
+    
+    if not cart:
+        flash("Cart is empty!", "warning")
+        return redirect(url_for('store.checkout'))
+
+    try:
+        process_issue(
+            user_id=session.get('user_id'),
+            teacher_id=teacher_id,
+            cart_items=cart,
+            signature_data=sig_data,
+            instance_path=tenant_instance_path()
+        )
+        session.pop('cart', None)
+        flash("Transaction Completed Successfully", "success")
+        return redirect(url_for('store.dashboard'))
+    except Exception as e:
+        flash(f"Error: {e}", "danger")
+        return redirect(url_for('store.checkout'))
+
+@bp.route('/restock', methods=['GET', 'POST'])
+def restock():
+    if request.method == 'POST':
+        # Simple restock implementation
+        try:
+            item_id = request.form.get('item_id')
+            qty = int(request.form.get('qty', 0))
+            if qty > 0:
+                adjust_stock(item_id, qty, "RESTOCK", note="Manual", user_id=session.get('user_id'))
+                db.session.commit()
+                flash("Stock added", "success")
+        except Exception as e:
+            flash(str(e), "danger")
+            
+    items = Item.query.all()
+    return render_template('restock.html', items=items)
+
+@bp.route('/inventory')
+def inventory():
+    items = Item.query.all()
+    return render_template('inventory.html', items=items)
+
+@bp.route('/items/<int:item_id>')
+def item_detail(item_id):
+    item = Item.query.get_or_404(item_id)
+    return render_template('item_detail.html', item=item)
+
+# Helper
+def generate_sku():
+    """Generates a unique SKU: SKU-YYYYMMDD-NNNNNN (serial from the 'sku' sequence)"""
+    date_str = datetime.now().strftime("%Y%m%d")
+    return f"SKU-{date_str}-{allocate('sku'):06d}"
+
+@bp.route('/items/new', methods=['GET', 'POST'])
+def item_new():
+    if request.method == 'POST':
+        try:
+            name = request.form['name']
+            stock = int(request.form.get('stock_on_hand', 0))
+            
+            # SKU Logic: Auto-generate if empty
+            sku = request.form.get('sku', '').strip()
+            if not sku:
+                sku = generate_sku()
+                
+            barcode_val = request.form.get('barcode', '').strip() or None
+            
+            # Auto-generate barcode value if empty
+            if not barcode_val:
+                barcode_val = generate_barcode_value()
+                
+            # Create Item
+            item = Item(name=name, sku=sku, stock_on_hand=0, barcode=barcode_val)
+            db.session.add(item)
+            bump_generation('items')
+            db.session.commit()
+            
+            # Log initial stock if > 0
+            if stock > 0:
+                adjust_stock(item.id, stock, "ADJUST", note="Initial Stock", user_id=session.get('user_id'))
+                db.session.commit()
+            else:
+                # No stock movement, but a new empty item is already below its reorder level
+                check_reorder(item)
+                db.session.commit()
+                
+            flash(f"Item '{name}' created. SKU: {sku}", "success")
+            return redirect(url_for('store.inventory'))
+        except Exception as e:
+            db.session.rollback()
+            flash(f"Error creating item: {str(e)}", "danger")
+            
+    return render_template('item_new.html')
+
+@bp.route('/items/<int:item_id>/barcode.png')
+def get_barcode_image(item_id):
+    item = Item.query.get_or_404(item_id)
+    
+    # Ensure folder exists (PythonAnywhere filesystem safety)
+    instance_path = tenant_instance_path()
+    os.makedirs(os.path.join(instance_path, 'barcodes'), exist_ok=True)
+    
+    if not item.barcode:
+        item.barcode = generate_barcode_value()
+        db.session.commit()
+    
+    try:
+        path = get_barcode_path(item.barcode, instance_path)
+        return send_file(path, mimetype='image/png')
+    except Exception as e:
+        return f"Error creating barcode: {e}", 500
+
+@bp.route('/labels', methods=['GET', 'POST'])
+def labels():
+    preview_items = []
+    job = None
+    if request.method == 'POST':
+        item_ids = request.form.getlist('item_ids')
+        preview_items = Item.query.filter(Item.id.in_(item_ids)).all()
+        # Render missing label images in the background instead of one request per image
+        missing = [i.id for i in preview_items
+                   if not i.barcode or not barcode_image_exists(i.barcode, tenant_instance_path())]
+        if missing:
+            job = job_runner.submit('render_barcodes', item_ids=missing)
+    
+    items = Item.query.filter_by(active=True).all()
+    return render_template('labels.html', kems=items, labels=preview_items, items=items, job=job)
+
+@bp.route('/teachers', methods=['GET', 'POST'])
+@response_cache.cached('teachers', 'departments')
+def teachers():
+    if request.method == 'POST':
+        try:
+            name = request.form['name']
+            email = request.form.get('email')
+            dept_id = request.form.get('department_id')
+            
+            t = Teacher(name=name, email=email, department_id=dept_id)
+            db.session.add(t)
+            bump_generation('teachers')
+            db.session.commit()
+            flash(f"Teacher '{name}' added.", "success")
+        except Exception as e:
+            flash(f"Error adding teacher: {e}", "danger")
+        return redirect(url_for('store.teachers'))
+
+    ts = Teacher.query.all()
+    ds = Department.query.all()
+    return render_template('teachers.html', teachers=ts, departments=ds)
+
+@bp.route('/departments')
+@response_cache.cached('departments', 'teachers')
+def departments():
+    ds = Department.query.all()
+    return render_template('departments.html', departments=ds)
+
+@bp.route('/reports')
+def reports():
+    return render_template('reports.html')
+
+@bp.route('/reports/analytics')
+def reports_analytics():
+    """Weekly consumption curves, term seasonality, forecasts and anomalies (?start=&end= ISO dates)"""
+    # NumPy is only imported by the first analytics request
+    from services.analytics import get_consumption_analytics, default_range, MAX_RANGE, MAX_RANGE_YEARS
+    start, end = default_range()
+    try:
+        start = date.fromisoformat(request.args['start']) if 'start' in request.args else start
+        end = date.fromisoformat(request.args['end']) if 'end' in request.args else end
+    except ValueError:
+        return jsonify({'error': 'start and end must be ISO dates (YYYY-MM-DD)'}), 400
+    if end <= start:
+        return jsonify({'error': 'end must be after start'}), 400
+    if end - start > MAX_RANGE:
+        return jsonify({'error': f'range is limited to {MAX_RANGE_YEARS} years'}), 400
+    return jsonify(get_consumption_analytics(start, end))
+
+@bp.route('/reorder')
+def reorder():
+    report = get_reorder_report()
+    return render_template('reorder.html', report=report)
+
+# --- Jobs ---
+
+@bp.route('/jobs/<int:job_id>')
+def job_status(job_id):
+    job = job_runner.get_or_404(job_id)
+    return jsonify({
+        'id': job.id,
+        'type': job.job_type,
+        'status': job.status,
+        'progress': job.progress,
+        'message': job.message,
+        'error': job.error,
+        'output_length': len(job.output or ''),
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None
+    })
+
+@bp.route('/jobs/<int:job_id>/output')
+def job_output(job_id):
+    """Streams the job log as plain text until the job finishes (?offset= to resume)"""
+    job_runner.get_or_404(job_id)
+    offset = request.args.get('offset', 0, type=int)
+
+    def generate(offset):
+        while True:
+            chunk = job_runner.read_output(job_id, offset)
+            if chunk:
+                offset += len(chunk)
+                yield chunk
+            status = job_runner.get(job_id).status
+            if status in ('succeeded', 'failed'):
+                rest = job_runner.read_output(job_id, offset)
+                if rest:
+                    yield rest
+                return
+            time.sleep(1)
+
+    return Response(stream_with_context(generate(offset)), mimetype='text/plain')
+
+@bp.route('/hx/jobs/<int:job_id>')
+def hx_job(job_id):
+    job = job_runner.get_or_404(job_id)
+    resp = make_response(render_fragment('hx/job.html', job=job))
+    if job.finished:
+        resp.headers['HX-Trigger'] = 'jobFinished'
+    return resp
+
+# --- Static Assets ---
+
+@bp.route('/assets/<path:filename>')
+def static_asset(filename):
+    return send_asset(filename)
+
+@bp.route('/sw.js')
+def service_worker():
+    # Served from the root so its scope covers /checkout
+    precache = [url_for('store.checkout')] + [asset_url(name) for name in ('app.css', 'app.js', 'signature.js')]
+    resp = make_response(render_template(
+        'sw.js',
+        version=manifest_version(current_app.static_folder),
+        shell_url=url_for('store.checkout'),
+        precache=precache
+    ))
+    resp.headers['Content-Type'] = 'application/javascript'
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp
+
+# --- HTMX ---
+
+@bp.route('/hx/items/search')
+@response_cache.cached('items')
+def hx_item_search():
+    q = request.args.get('q', '').strip()
+    if not q: return ''
+    
+    # Exact barcode match?
+    exact = Item.query.filter_by(barcode=q).first()
+    if exact: # Add directly if scanned? For now just show result top
+        items = [exact]
+    elif not is_valid_barcode_value(q):
+        # Misread scan of one of our labels (bad check digit). Checked after the exact
+        # lookup so manually entered barcodes of the same shape are still found.
+        return render_fragment('hx/item_search.html', items=[], misread=True)
+    else:
+        items = Item.query.filter(
+            or_(Item.name.ilike(f'%{q}%'), Item.sku.ilike(f'%{q}%'))
+        ).limit(10).all()
+        
+    return render_fragment('hx/item_search.html', items=items)
+
+@bp.route('/hx/cart/count')
+def hx_cart_count():
+    cart = session.get('cart', {})
+    count = sum(cart.values())
+    return str(count)
+
+@bp.route('/hx/teachers/search')
+@response_cache.cached('teachers', 'departments')
+def hx_teacher_search():
+    q = request.args.get('q', '').strip()
+    if len(q) < 2: return ''
+    teachers = Teacher.query.filter(Teacher.name.ilike(f'%{q}%')).limit(10).all()
+    return render_fragment('hx/teacher_search.html', teachers=teachers)
+
+@bp.route('/hx/cart/view')
+def hx_cart_view():
+    cart = session.get('cart', {})
+    cart_items = []
+    if cart:
+        items = Item.query.filter(Item.id.in_(cart.keys())).all()
+        for i in items:
+            i.qty = cart[str(i.id)]
+            cart_items.append(i)
+    return render_fragment('hx/cart.html', cart_items=cart_items)
+
+@bp.route('/hx/cart/add', methods=['POST'])
+def hx_cart_add():
+    item_id = str(request.form.get('item_id'))
+    qty = int(request.form.get('qty', 1))
+    cart = session.get('cart', {})
+    cart[item_id] = cart.get(item_id, 0) + qty
+    session['cart'] = cart
+    resp = make_response("Added")
+    resp.headers['HX-Trigger'] = 'cartUpdated'
+    return resp
+
+@bp.route('/hx/cart/update', methods=['POST'])
+def hx_cart_update():
+    item_id = str(request.form.get('item_id'))
+    qty = int(request.form.get('qty', 1))
+    cart = session.get('cart', {})
+    if qty > 0:
+        cart[item_id] = qty
+    else:
+        cart.pop(item_id, None)
+    session['cart'] = cart
+    return redirect(url_for('store.hx_cart_view'))
+
+@bp.route('/hx/cart/remove', methods=['POST'])
+def hx_cart_remove():
+    item_id = str(request.form.get('item_id'))
+    cart = session.get('cart', {})
+    cart.pop(item_id, None)
+    session['cart'] = cart
+    return redirect(url_for('store.hx_cart_view'))
+
+@bp.route('/hx/items/<int:item_id>/history')
+def hx_item_history(item_id):
+    item = Item.query.get_or_404(item_id)
+    try:
+        before, balance = parse_cursor(request.args)
+    except ValueError:
+        return 'Invalid cursor', 400
+    history, next_cursor = get_item_history(item, before=before, balance=balance)
+    return render_fragment('hx/item_history.html', item=item, history=history, next_cursor=next_cursor)
+
+@bp.route('/hx/reorder/alerts')
+def hx_reorder_alerts():
+    limit = request.args.get('limit', 20, type=int)
+    alerts = get_alert_feed(limit=min(limit, 100))
+    return render_fragment('hx/reorder_alerts.html', alerts=alerts)
+
+@bp.route('/hx/scan/pull')
+def hx_scan_pull():
+    """Fallback polling if socketio fails or for connection status check"""
+    # code = request.args.get('code')
+    # Actually just used to verify connection visually
+    return ''